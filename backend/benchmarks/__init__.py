@@ -0,0 +1,41 @@
+"""
+Benchmarks for the events app.
+
+They run against a throwaway test database created from the configured
+DATABASES setting, e.g.::
+
+    python -m benchmarks.participant_lookups --participants 1000000
+
+Importing this package configures Django, so benchmark modules can import
+models at the top level.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'private_event_planner.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+
+@contextmanager
+def test_database():
+    """Create a migrated test database and destroy it afterwards."""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def timer(label, count=1):
+    """Print the elapsed and per-operation time of the enclosed block."""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f"{label:<48} {elapsed:9.3f} s  {elapsed / count * 1e6:12.1f} us/op")
@@ -0,0 +1,46 @@
+"""
+Compare per-message render cost of an update notification fan-out:
+render_to_string for every recipient versus one broadcast render.
+
+    python -m benchmarks.email_rendering --recipients 10000
+"""
+import argparse
+
+from django.template.loader import render_to_string
+
+from benchmarks import timer
+from events.rendering import email_template
+
+TEMPLATE = 'event_update_notification'
+CONTEXT = {
+    'event_name': "Summer party",
+    'event_link': "http://localhost/event/0b0e6d3c-4e7a-4d8e-9a57-5a8f4e0f0d61",
+    'event_uuid': "0b0e6d3c-4e7a-4d8e-9a57-5a8f4e0f0d61",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--recipients', type=int, default=10_000)
+    args = parser.parse_args()
+    names = [f"Guest {i}" for i in range(args.recipients)]
+
+    with timer("render_to_string per recipient", len(names)):
+        for name in names:
+            context = {**CONTEXT, 'participant_name': name}
+            render_to_string(f'{TEMPLATE}.txt', context)
+            render_to_string(f'{TEMPLATE}.html', context)
+
+    with timer("compiled template per recipient", len(names)):
+        template = email_template(TEMPLATE)
+        for name in names:
+            template.render({**CONTEXT, 'participant_name': name})
+
+    with timer("broadcast render", len(names)):
+        broadcast = email_template(TEMPLATE).broadcast(CONTEXT)
+        for name in names:
+            broadcast.render(name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Time and peak Python memory of deleting an event with many comments, through
+Django's cascade collector and through the chunked purge job.
+
+    python -m benchmarks.event_purge --participants 5000 --comments 50000
+"""
+import argparse
+import time
+import tracemalloc
+
+from django.utils import timezone
+
+from benchmarks import test_database
+from events import purge
+from events.models import Comment, Event, Participant
+
+
+def create_event(participants, comments):
+    now = timezone.now()
+    event = Event.objects.create(name="Purge", location="Somewhere",
+                                 start_datetime=now, end_datetime=now,
+                                 organizer_email="organizer@example.com")
+    authors = Participant.objects.bulk_create(
+        (Participant(event=event, name=f"Guest {i}", email=f"guest{i}@example.com")
+         for i in range(participants)), batch_size=1000)
+    # Threads of ten comments, each a reply to the previous one
+    parent = None
+    for i in range(comments):
+        parent = Comment.objects.create(event=event, author=authors[i % participants],
+                                        parent=None if i % 10 == 0 else parent,
+                                        content=f"Comment {i}")
+    return event
+
+
+def measure(label, delete):
+    tracemalloc.start()
+    start = time.perf_counter()
+    delete()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<9}: {elapsed:6.2f} s, peak {peak / 1024 / 1024:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--participants', type=int, default=5_000)
+    parser.add_argument('--comments', type=int, default=50_000)
+    args = parser.parse_args()
+
+    with test_database():
+        event = create_event(args.participants, args.comments)
+        measure("collector", event.delete)
+        event = create_event(args.participants, args.comments)
+        measure("purge", lambda: purge.purge(event.id))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Time to first byte, total time and peak Python memory of the streaming
+participant export, for growing guest lists.
+
+    python -m benchmarks.exports --rows 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from django.utils import timezone
+
+from benchmarks import test_database
+from events import exports
+from events.models import Event, Participant
+
+
+def create_event(rows):
+    now = timezone.now()
+    event = Event.objects.create(name="Export", location="Somewhere",
+                                 start_datetime=now, end_datetime=now,
+                                 organizer_email="organizer@example.com")
+    Participant.objects.bulk_create(
+        (Participant(event=event, name=f"Guest {i}", email=f"guest{i}@example.com")
+         for i in range(rows)), batch_size=1000)
+    return event
+
+
+def export(event, rows, file_format):
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = exports.iter_export('participants', file_format, event.pk)
+    size = len(next(chunks))
+    first_byte = time.perf_counter() - start
+    for chunk in chunks:
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{file_format:<6} {rows:>7} rows: first byte {first_byte * 1000:7.1f} ms, "
+          f"total {elapsed:6.2f} s, {size / 1024 / 1024:6.1f} MiB sent, "
+          f"peak {peak / 1024 / 1024:6.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    with test_database():
+        for rows in (args.rows // 10, args.rows):
+            event = create_event(rows)
+            for file_format in exports.CONTENT_TYPES:
+                export(event, rows, file_format)
+
+
+if __name__ == '__main__':
+    main()
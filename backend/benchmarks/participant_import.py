@@ -0,0 +1,84 @@
+"""
+Throughput and peak Python memory of the chunked participant CSV import, for
+growing files, next to a row-by-row import of the same rows.
+
+    python -m benchmarks.participant_import --rows 100000 --naive-rows 5000
+"""
+import argparse
+import io
+import tempfile
+import time
+import tracemalloc
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from benchmarks import test_database
+from events import imports
+from events.models import Event, Participant, ParticipantImport
+
+
+def create_event():
+    now = timezone.now()
+    return Event.objects.create(name="Import", location="Somewhere",
+                                start_datetime=now, end_datetime=now,
+                                organizer_email="organizer@example.com")
+
+
+def csv_data(rows) -> bytes:
+    lines = ['name,email']
+    for i in range(rows):
+        # Every tenth row repeats the email of the previous one
+        guest = i - 1 if i % 10 == 9 else i
+        lines.append(f"Guest {i},guest{guest}@example.com")
+    return '\n'.join(lines).encode()
+
+
+def chunked_import(rows):
+    data = csv_data(rows)
+    participant_import = ParticipantImport.objects.create(
+        event=create_event(), file=ContentFile(data, name='guests.csv'),
+        size=len(data))
+    tracemalloc.start()
+    start = time.perf_counter()
+    imports.run(participant_import)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    participant_import.refresh_from_db()
+    print(f"chunked {rows:>7} rows: {rows / elapsed:9.1f} rows/s, "
+          f"peak {peak / 1024 / 1024:6.1f} MiB, "
+          f"{participant_import.created_count} created, "
+          f"{participant_import.duplicate_count} duplicates")
+
+
+def naive_import(rows):
+    event = create_event()
+    start = time.perf_counter()
+    for _, (name, email) in imports.read_rows(io.StringIO(csv_data(rows).decode())):
+        try:
+            with transaction.atomic():
+                Participant.objects.create(event=event, name=name, email=email)
+        except IntegrityError:  # noqa: PERF203
+            continue
+    elapsed = time.perf_counter() - start
+    print(f"naive   {rows:>7} rows: {rows / elapsed:9.1f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--naive-rows', type=int, default=5_000)
+    args = parser.parse_args()
+
+    with test_database(), tempfile.TemporaryDirectory() as location, \
+            override_settings(PRIVATE_MEDIA_ROOT=location):
+        for rows in (args.rows // 10, args.rows):
+            chunked_import(rows)
+        naive_import(args.naive_rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Compare the hot participant and comment lookups with and without
+the composite indexes and the per-event unique email constraint.
+
+    python -m benchmarks.participant_lookups --participants 1000000
+"""
+import argparse
+import random
+import uuid
+
+from django.utils import timezone
+
+from benchmarks import test_database, timer
+from events.models import Comment, Event, Participant
+
+BATCH_SIZE = 10_000
+
+
+def seed(participants, events, comments):
+    now = timezone.now()
+    Event.objects.bulk_create(
+        Event(name=f"Event {i}", location="Somewhere", start_datetime=now,
+              end_datetime=now, organizer_email="organizer@example.com")
+        for i in range(events))
+    event_ids = list(Event.objects.values_list('id', flat=True))
+
+    with timer(f"insert {participants} participants", participants):
+        for start in range(0, participants, BATCH_SIZE):
+            Participant.objects.bulk_create(
+                Participant(uuid=uuid.uuid4(), event_id=event_ids[i % events],
+                            name=f"Guest {i}", email=f"guest{i}@example.com")
+                for i in range(start, min(start + BATCH_SIZE, participants)))
+
+    authors = dict(Participant.objects.filter(id__lte=events)
+                   .values_list('event_id', 'id'))
+    for start in range(0, comments, BATCH_SIZE):
+        Comment.objects.bulk_create(
+            Comment(uuid=uuid.uuid4(), event_id=event_id,
+                    author_id=authors[event_id], content="Hello")
+            for event_id in (event_ids[i % events]
+                             for i in range(start, min(start + BATCH_SIZE, comments))))
+    return event_ids
+
+
+def measure(event_ids, participants, lookups):
+    guests = [random.randrange(participants) for _ in range(lookups)]
+    events = len(event_ids)
+
+    with timer("duplicate email check", lookups):
+        for i in guests:
+            Participant.objects.filter(event_id=event_ids[i % events],
+                                       email=f"guest{i}@example.com").exists()
+    with timer("first participant page of an event", lookups):
+        for i in guests:
+            list(Participant.objects.filter(event_id=event_ids[i % events])
+                 .order_by('id')[:100])
+    with timer("top-level comments of an event", lookups):
+        for i in guests:
+            list(Comment.objects.filter(event_id=event_ids[i % events],
+                                        parent__isnull=True).order_by('date')[:50])
+
+
+def drop_indexes(connection):
+    with connection.schema_editor() as editor:
+        for constraint in Participant._meta.constraints:  # noqa: SLF001
+            editor.remove_constraint(Participant, constraint)
+        for model in (Participant, Comment):
+            for index in model._meta.indexes:  # noqa: SLF001
+                editor.remove_index(model, index)
+
+
+def analyze(connection):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--participants', type=int, default=1_000_000)
+    parser.add_argument('--events', type=int, default=10_000)
+    parser.add_argument('--comments', type=int, default=200_000)
+    parser.add_argument('--lookups', type=int, default=2_000)
+    args = parser.parse_args()
+
+    with test_database() as connection:
+        event_ids = seed(args.participants, args.events, args.comments)
+        analyze(connection)
+        print("-- with composite indexes and unique constraint")
+        measure(event_ids, args.participants, args.lookups)
+        drop_indexes(connection)
+        analyze(connection)
+        print("-- without them")
+        measure(event_ids, args.participants, args.lookups)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Burst of concurrent invitation accepts against one event: accepts/sec of the
+conditional seat reservation, and how far a count-then-insert check would
+oversubscribe the same event.
+
+    python -m benchmarks.rsvp_burst --threads 64 --accepts 2000 --limit 500
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from benchmarks import test_database
+from events.models import Event, Invitation, Participant
+
+
+def create_event(limit):
+    now = timezone.now()
+    return Event.objects.create(name="Burst", location="Somewhere",
+                                start_datetime=now, end_datetime=now,
+                                organizer_email="organizer@example.com",
+                                participants_limit=limit)
+
+
+def burst(threads, accepts, accept):
+    barrier = threading.Barrier(threads)
+
+    def run(worker) -> list:
+        barrier.wait()
+        try:
+            return [accept(i) for i in range(worker, accepts, threads)]
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = [code for codes in pool.map(run, range(threads)) for code in codes]
+    return results, time.perf_counter() - start
+
+
+def reserved_accepts(threads, accepts, limit):
+    event = create_event(limit)
+    invitation = Invitation.objects.create(event=event)
+    url = reverse('events:invitation-accept')
+
+    def accept(i) -> int:
+        return APIClient(SERVER_NAME='localhost').post(url, format='json', data={
+            'invitation': str(invitation.uuid),
+            'name': f"Guest {i}",
+            'email': f"guest{i}@example.com",
+        }).status_code
+
+    codes, elapsed = burst(threads, accepts, accept)
+    event.refresh_from_db()
+    print(f"conditional reservation: {accepts / elapsed:9.1f} accepts/s, "
+          f"{codes.count(201)} joined, {codes.count(202)} waitlisted, "
+          f"{event.participants.count()} participants for a limit of {limit}")
+
+
+def naive_accepts(threads, accepts, limit):
+    event = create_event(limit)
+
+    def accept(i) -> int:
+        with transaction.atomic():
+            if event.participants.count() >= limit:
+                return 409
+            Participant.objects.create(event=event, name=f"Guest {i}",
+                                       email=f"guest{i}@example.com")
+            return 201
+
+    codes, elapsed = burst(threads, accepts, accept)
+    print(f"count then insert:       {accepts / elapsed:9.1f} accepts/s, "
+          f"{codes.count(201)} joined, {codes.count(409)} turned away, "
+          f"{event.participants.count()} participants for a limit of {limit}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--accepts', type=int, default=2_000)
+    parser.add_argument('--limit', type=int, default=500)
+    args = parser.parse_args()
+
+    with test_database() as db:
+        reserved_accepts(args.threads, args.accepts, args.limit)
+        if db.vendor == 'sqlite':
+            # SQLite fails concurrent read-then-write transactions outright
+            print("count then insert:       skipped on SQLite")
+        else:
+            naive_accepts(args.threads, args.accepts, args.limit)
+
+
+if __name__ == '__main__':
+    main()
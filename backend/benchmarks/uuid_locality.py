@@ -0,0 +1,96 @@
+"""
+Insert throughput and size of the unique ``uuid`` indexes of participants
+and comments, with random (v4) and time-ordered (v7) uuids. Each variant
+fills emptied tables.
+
+    python -m benchmarks.uuid_locality --participants 2000000 --comments 2000000
+"""
+import argparse
+import uuid
+
+from django.utils import timezone
+
+from benchmarks import test_database, timer
+from events.models import Comment, Event, Participant
+from events.uuids import uuid7
+
+BATCH_SIZE = 10_000
+GENERATORS = {'v4': uuid.uuid4, 'v7': uuid7}
+
+
+def insert(new_uuid, participants, comments, events):
+    now = timezone.now()
+    Event.objects.bulk_create(
+        Event(name=f"Event {i}", location="Somewhere", start_datetime=now,
+              end_datetime=now, organizer_email="organizer@example.com")
+        for i in range(events))
+    event_ids = list(Event.objects.values_list('id', flat=True))
+
+    with timer(f"insert {participants} participants", participants):
+        for start in range(0, participants, BATCH_SIZE):
+            Participant.objects.bulk_create(
+                Participant(uuid=new_uuid(), event_id=event_ids[i % events],
+                            name=f"Guest {i}", email=f"guest{i}@example.com")
+                for i in range(start, min(start + BATCH_SIZE, participants)))
+
+    # The first participants are one of each event
+    authors = dict(Participant.objects.order_by('id')
+                   .values_list('event_id', 'id')[:events])
+    with timer(f"insert {comments} comments", comments):
+        for start in range(0, comments, BATCH_SIZE):
+            Comment.objects.bulk_create(
+                Comment(uuid=new_uuid(), event_id=event_ids[i % events],
+                        author_id=authors[event_ids[i % events]], content="Hello")
+                for i in range(start, min(start + BATCH_SIZE, comments)))
+
+
+def reset(connection):
+    """Empty the tables and give their pages back, so indexes start out empty."""
+    models = (Comment, Participant, Event)
+    tables = [model._meta.db_table for model in models]  # noqa: SLF001
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'TRUNCATE {", ".join(tables)} RESTART IDENTITY CASCADE')
+        else:
+            for table in tables:
+                cursor.execute(f'DELETE FROM {table}')  # noqa: S608
+            cursor.execute('VACUUM')
+
+
+def uuid_index_size(connection, model) -> int:
+    """Return the size in bytes of the unique index on ``model.uuid``."""
+    table = model._meta.db_table  # noqa: SLF001
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            constraints = connection.introspection.get_constraints(cursor, table)
+            name = next(name for name, constraint in constraints.items()
+                        if constraint['columns'] == ['uuid'] and constraint['unique'])
+            cursor.execute('SELECT pg_relation_size(%s::regclass)', [name])
+        else:
+            # SQLite names the index of an inline UNIQUE constraint itself
+            cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = ('
+                           'SELECT list.name FROM pragma_index_list(%s) AS list '
+                           'JOIN pragma_index_info(list.name) AS info '
+                           'WHERE list."unique" AND info.name = %s)', [table, 'uuid'])
+        return cursor.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--participants', type=int, default=2_000_000)
+    parser.add_argument('--comments', type=int, default=2_000_000)
+    parser.add_argument('--events', type=int, default=1_000)
+    args = parser.parse_args()
+
+    with test_database() as connection:
+        for version, new_uuid in GENERATORS.items():
+            print(f"-- {version}")
+            reset(connection)
+            insert(new_uuid, args.participants, args.comments, args.events)
+            for model in (Participant, Comment):
+                size = uuid_index_size(connection, model)
+                print(f"{model.__name__} uuid index: {size / 1024 / 1024:9.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,13 @@
 from django.contrib import admin
 
-from .models import Event, Participant
+from .models import (
+    ArchivedEvent,
+    Event,
+    ImageUpload,
+    Participant,
+    ParticipantImport,
+    WaitlistEntry,
+)
 
 
 @admin.register(Event)
@@ -12,3 +19,31 @@ class EventAdmin(admin.ModelAdmin):
 class ParticipantAdmin(admin.ModelAdmin):
     list_display = ('id', 'uuid', 'event', 'name', 'email')
 
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'uuid', 'event', 'name', 'email', 'created_at')
+
+
+@admin.register(ImageUpload)
+class ImageUploadAdmin(admin.ModelAdmin):
+    list_display = ('id', 'uuid', 'size', 'received', 'format', 'created_at',
+                    'completed_at')
+
+
+@admin.register(ParticipantImport)
+class ParticipantImportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'uuid', 'event', 'status', 'rows_processed', 'created_count',
+                    'error_count', 'created_at', 'finished_at')
+
+
+@admin.register(ArchivedEvent)
+class ArchivedEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'uuid', 'name', 'start_datetime', 'end_datetime',
+                    'organizer_email', 'archived_at')
+
+    def has_add_permission(self, request):  # noqa: ARG002
+        return False
+
+    def has_change_permission(self, request, obj=None):  # noqa: ARG002
+        return False
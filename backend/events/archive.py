@@ -0,0 +1,82 @@
+"""
+Archival of past events.
+
+Events that ended more than EVENT_RETENTION_DAYS ago are copied into one
+compact ``ArchivedEvent`` row each, holding their participants and comments
+as lists of rows, and then purged from the live tables. Invitations,
+waitlist entries, imports and the image are not kept. Each event is
+archived in a transaction of its own, so an event is never both live and
+archived, nor lost in between, and only the rows of one event are held in
+memory at a time.
+"""
+import datetime as dt
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import event_cache, exports, purge
+from .models import ArchivedEvent, Event
+
+# Event fields copied to the archive as they are
+FIELDS = ('uuid', 'name', 'location', 'start_datetime', 'end_datetime',
+          'organizer_email', 'organizer_name', 'description', 'link',
+          'participants_limit')
+
+
+def as_dicts(name, rows) -> list[dict]:
+    """Turn archived rows of the ``name`` export back into field dicts."""
+    fields = exports.EXPORTS[name][0]
+    return [dict(zip(fields, row, strict=True)) for row in rows]
+
+
+def cutoff(days=None) -> dt.datetime:
+    """Return the end before which events expire, ``days`` defaulting to the setting."""
+    if days is None:
+        days = settings.EVENT_RETENTION_DAYS
+    return timezone.now() - dt.timedelta(days=days)
+
+
+def expired(before):
+    return Event.objects.filter(end_datetime__lt=before)
+
+
+def snapshot(event) -> ArchivedEvent:
+    rows = {name: list(query(event.id).iterator(chunk_size=exports.CHUNK_SIZE))
+            for name, (_, query) in exports.EXPORTS.items()}
+    return ArchivedEvent(**{field: getattr(event, field) for field in FIELDS}, **rows)
+
+
+def archive_event(event_id, before) -> bool:
+    """
+    Archive and purge an event if it still ended before ``before``. Returns
+    False if it did not or is locked by a concurrent run.
+    """
+    with transaction.atomic():
+        event = (expired(before).select_for_update(skip_locked=True)
+                 .filter(pk=event_id).first())
+        if event is None:
+            return False
+        snapshot(event).save()
+        purge.purge(event.id)
+        event_cache.invalidate(event.uuid)
+    return True
+
+
+def archive_batch(before, batch_size) -> int:
+    """
+    Archive up to ``batch_size`` events that ended before ``before``, the
+    oldest first. Events locked by a concurrent run are skipped. Returns the
+    number of archived events.
+    """
+    event_ids = list(expired(before).order_by('end_datetime', 'id')
+                     .values_list('id', flat=True)[:batch_size])
+    return sum(archive_event(event_id, before) for event_id in event_ids)
+
+
+def archive(before, batch_size) -> int:
+    """Archive all events that ended before ``before``, batch by batch."""
+    archived = 0
+    while count := archive_batch(before, batch_size):
+        archived += count
+    return archived
@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+from .models import Comment, Event
+
+
+class CommentTree:
+    """
+    In-memory index of all comments of an event.
+    Built from a single query, so serializing nested replies
+    does not hit the database once per comment.
+    """
+
+    def __init__(self, comments, max_depth=None, max_replies=None) -> None:
+        """
+        Index the given comments.
+        max_depth and max_replies limit the replies returned for each comment.
+        """
+        self.comments = list(comments)
+        self.roots = []
+        self.max_depth = max_depth
+        self.max_replies = max_replies
+        self._children = defaultdict(list)
+
+        by_id = {comment.id: comment for comment in self.comments}
+        parent_field = Comment.parent.field
+        for comment in self.comments:
+            parent = by_id.get(comment.parent_id)
+            if parent is None:
+                self.roots.append(comment)
+                continue
+            parent_field.set_cached_value(comment, parent)
+            self._children[parent.id].append(comment)
+
+    @classmethod
+    def for_event(cls, event: Event, **kwargs) -> 'CommentTree':
+        comments = (Comment.objects.filter(event=event)
+                    .select_related('author')
+                    .order_by('date', 'id'))
+        tree = cls(comments, **kwargs)
+        event_field = Comment.event.field
+        for comment in tree.comments:
+            event_field.set_cached_value(comment, event)
+        return tree
+
+    def children(self, comment):
+        return self._children.get(comment.id, [])
+
+    def replies(self, comment, depth=0):
+        """Return replies of a comment shown at the given nesting depth."""
+        if self.max_depth is not None and depth >= self.max_depth:
+            return []
+        children = self.children(comment)
+        if self.max_replies is not None:
+            return children[:self.max_replies]
+        return children
+
+    def hidden_replies(self, comment, depth=0):
+        """Return the number of direct replies left out by the limits."""
+        return len(self.children(comment)) - len(self.replies(comment, depth))
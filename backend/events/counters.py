@@ -0,0 +1,63 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import event_cache
+from .exceptions import EventFull
+
+
+def _count(model) -> Coalesce:
+    rows = (model.objects.filter(event=OuterRef('pk')).order_by()
+            .values('event').annotate(count=Count('pk')).values('count'))
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def counter_expressions(participant_model, comment_model) -> dict:
+    """Return update expressions recomputing the denormalized counters of an event."""
+    return {
+        'participant_count': _count(participant_model),
+        'comment_count': _count(comment_model),
+    }
+
+
+def recount(events, participant_model, comment_model, batch_size=1000) -> int:
+    """Recompute counters of ``events`` in primary key batches."""
+    expressions = counter_expressions(participant_model, comment_model)
+    updated = 0
+    last_id = 0
+    while True:
+        rows = list(events.filter(pk__gt=last_id).order_by('pk')
+                    .values_list('pk', 'uuid')[:batch_size])
+        if not rows:
+            return updated
+        ids, uuids = zip(*rows, strict=True)
+        updated += events.model.objects.filter(pk__in=ids).update(**expressions)
+        event_cache.invalidate(*uuids)
+        last_id = ids[-1]
+
+
+def reserve_seat(event) -> None:
+    """
+    Take one seat of an event or raise EventFull.
+
+    A single conditional UPDATE checks the limit and increments the counter,
+    so concurrent accepts only contend on the event row, and only until the
+    surrounding transaction commits. Must run inside that transaction, so a
+    failed insert gives the seat back.
+    """
+    has_room = Q(participants_limit__isnull=True) | Q(
+        participant_count__lt=F('participants_limit'))
+    reserved = type(event).objects.filter(has_room, pk=event.pk).update(
+        participant_count=F('participant_count') + 1, updated_at=timezone.now())
+    if not reserved:
+        raise EventFull
+
+
+def add_participant(event, **fields):
+    """Create a participant in a seat reserved with reserve_seat."""
+    reserve_seat(event)
+    participant = event.participants.model(event=event, **fields)
+    # Tells the post_save handler the counter is already up to date
+    participant.seat_reserved = True
+    participant.save()
+    return participant
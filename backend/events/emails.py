@@ -2,7 +2,8 @@ import logging
 
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+
+from .rendering import email_template
 
 logger = logging.getLogger(__name__)
 def send_event_invite_email_sync(to_email, name, surname, event_details):
@@ -23,9 +24,7 @@ def send_event_invite_email_sync(to_email, name, surname, event_details):
         'event_link': event_details.get('event_link'),
     }
 
-    text_content = render_to_string('invite_email.txt', context)
-
-    html_content = render_to_string('invite_email.html', context)
+    text_content, html_content = email_template('invite_email').render(context)
 
     try:
         msg = EmailMultiAlternatives(subject, text_content, from_email, recipient_list)
@@ -0,0 +1,93 @@
+"""
+Read-through cache of the public event payload, keyed by event uuid.
+
+Entries are deleted by the signal handlers in events.signals whenever the event
+or one of its participants or comments changes, and again once the surrounding
+transaction commits, so a reader racing the write cannot re-cache stale rows.
+Those deletions only reach the cache of the process making the change, e.g. a
+dramatiq worker, unless the cache is shared, so every hit is also checked
+against the ``updated_at`` of the event, which any change bumps.
+"""
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Event
+
+HITS_KEY = 'event-cache:hits'
+MISSES_KEY = 'event-cache:misses'
+
+
+def get_cache():
+    return caches[settings.EVENT_CACHE_ALIAS]
+
+
+def _key(uuid) -> str:
+    return f'event:{uuid}'
+
+
+def _count(key) -> None:
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr
+        cache.set(key, 1, timeout=None)
+
+
+def current_version(uuid):
+    """Return the ``updated_at`` of a live event, or None if there is none."""
+    return (Event.objects.filter(uuid=uuid)
+            .values_list('updated_at', flat=True).first())
+
+
+def get(uuid):
+    """
+    Return the cached payload of an event, counting the hit or miss. A payload
+    of an older version of the event, or of a deleted one, is a miss.
+    """
+    payload = get_cache().get(_key(uuid))
+    if payload is not None and payload['updated_at'] != current_version(uuid):
+        payload = None
+    _count(MISSES_KEY if payload is None else HITS_KEY)
+    return payload
+
+
+def store(uuid, payload) -> None:
+    get_cache().set(_key(uuid), payload, settings.EVENT_CACHE_TIMEOUT)
+
+
+def invalidate(*uuids) -> None:
+    keys = [_key(uuid) for uuid in uuids if uuid is not None]
+    if not keys:
+        return
+    cache = get_cache()
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def stats() -> dict:
+    counts = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits = counts.get(HITS_KEY, 0)
+    misses = counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else None,
+    }
+
+
+def reset_stats() -> None:
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+def parse_uuid(value):
+    """Return ``value`` as a UUID, or None if it is not one."""
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
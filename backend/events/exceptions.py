@@ -0,0 +1,20 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class EventFull(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This event has reached its participants limit."
+    default_code = 'event_full'
+
+
+class InvalidUpload(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "The upload is not a supported image."
+    default_code = 'invalid_upload'
+
+
+class UploadOffsetMismatch(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The chunk does not start where the upload left off."
+    default_code = 'upload_offset_mismatch'
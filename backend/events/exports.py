@@ -0,0 +1,89 @@
+"""
+Streaming exports of an event's participants and comments for its organizer.
+
+Rows come from ``values_list().iterator()`` and are encoded a chunk at a
+time, so neither the query result nor the response is ever held in memory.
+"""
+import csv
+import datetime as dt
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Participant
+
+# Rows fetched from the database and written to the response at a time
+CHUNK_SIZE = 2000
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def participant_rows(event_id):
+    return (Participant.objects.filter(event_id=event_id).order_by('id')
+            .values_list('uuid', 'name', 'email'))
+
+
+def comment_rows(event_id):
+    return (Comment.objects.filter(event_id=event_id).order_by('date', 'id')
+            .values_list('uuid', 'parent__uuid', 'author__name', 'author__email',
+                         'date', 'content'))
+
+
+# Export name, its field names and the query of its rows
+EXPORTS = {
+    'participants': (('uuid', 'name', 'email'), participant_rows),
+    'comments': (('uuid', 'parent', 'author', 'author_email', 'date', 'content'),
+                 comment_rows),
+}
+
+
+def chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Echo:
+    """File-like target of csv.writer that returns each written line."""
+
+    def write(self, line) -> str:
+        return line
+
+
+def csv_cell(value):
+    if isinstance(value, dt.datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def iter_csv(fields, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for chunk in chunks(rows):
+        yield ''.join(writer.writerow([csv_cell(value) for value in row])
+                      for row in chunk)
+
+
+def iter_ndjson(fields, rows):
+    encoder = DjangoJSONEncoder()
+    for chunk in chunks(rows):
+        yield ''.join(f'{encoder.encode(dict(zip(fields, row, strict=True)))}\n'
+                      for row in chunk)
+
+
+def iter_export(name, file_format, event_id):
+    """Yield the encoded chunks of an export, querying rows as they are sent."""
+    fields, query = EXPORTS[name]
+    rows = query(event_id).iterator(chunk_size=CHUNK_SIZE)
+    encode = iter_csv if file_format == 'csv' else iter_ndjson
+    return encode(fields, rows)
@@ -0,0 +1,104 @@
+"""
+Minimal iCalendar (RFC 5545) writer producing the same properties, in the same
+order, as the ``ics`` library, without building an object per attendee.
+"""
+import datetime as dt
+from collections.abc import Iterable, Iterator
+
+CRLF = '\r\n'
+MAX_LINE_OCTETS = 75
+PRODID = 'ics.py - http://git.io/lLljaA'
+CALENDAR_HEADER = ('BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}')
+CALENDAR_FOOTER = ('END:VCALENDAR',)
+
+
+def escape(value: str) -> str:
+    # TEXT has no escape for a carriage return, so every line break becomes \n
+    value = value.replace('\r\n', '\n').replace('\r', '\n')
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\n', '\\n'))
+
+
+def format_datetime(value: dt.datetime) -> str:
+    return value.astimezone(dt.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def fold(line: str) -> str:
+    """Fold a content line into chunks of at most 75 octets."""
+    if len(line.encode()) <= MAX_LINE_OCTETS:
+        return line
+    chunks = []
+    start = 0
+    size = 0
+    limit = MAX_LINE_OCTETS
+    for index, char in enumerate(line):
+        char_size = len(char.encode())
+        if size + char_size > limit:
+            chunks.append(line[start:index])
+            start = index
+            size = 0
+            # Continuation lines start with a space, which counts towards the limit
+            limit = MAX_LINE_OCTETS - 1
+        size += char_size
+    chunks.append(line[start:])
+    return (CRLF + ' ').join(chunks)
+
+
+def person(name: str, email: str, common_name: str) -> str:
+    return f'{name};CN={escape(common_name or email)}:{escape(f"mailto:{email}")}'
+
+
+def vevent_lines(event, attendees: Iterable[tuple[str, str]]) -> Iterator[str]:
+    """
+    Yield the unfolded lines of a VEVENT.
+    Attendees are (email, name) pairs and are consumed lazily.
+    """
+    yield 'BEGIN:VEVENT'
+    for email, name in attendees:
+        yield person('ATTENDEE', email, name)
+    if event.description:
+        yield f'DESCRIPTION:{escape(event.description)}'
+    yield f'DTEND:{format_datetime(event.end_datetime)}'
+    if event.location:
+        yield f'LOCATION:{escape(event.location)}'
+    yield person('ORGANIZER', event.organizer_email, event.organizer_name)
+    yield f'DTSTART:{format_datetime(event.start_datetime)}'
+    if event.name:
+        yield f'SUMMARY:{escape(event.name)}'
+    yield f'UID:{event.uuid}'
+    if event.link:
+        yield f'URL:{escape(event.link)}'
+    yield 'END:VEVENT'
+
+
+def iter_calendar(lines: Iterable[str], chunk_lines=500) -> Iterator[str]:
+    """
+    Wrap content lines in a VCALENDAR and yield folded text in chunks
+    of ``chunk_lines`` lines. Lines are separated, not terminated, by CRLF.
+    """
+    separator = ''
+    chunk = []
+    for line in _calendar_lines(lines):
+        chunk.append(fold(line))
+        if len(chunk) >= chunk_lines:
+            yield separator + CRLF.join(chunk)
+            separator = CRLF
+            chunk = []
+    if chunk:
+        yield separator + CRLF.join(chunk)
+
+
+def _calendar_lines(lines: Iterable[str]) -> Iterator[str]:
+    yield from CALENDAR_HEADER
+    yield from lines
+    yield from CALENDAR_FOOTER
+
+
+def vevent(event, attendees: Iterable[tuple[str, str]]) -> str:
+    """Return a folded VEVENT fragment, ready to be embedded in a calendar."""
+    return CRLF.join(fold(line) for line in vevent_lines(event, attendees))
+
+
+def calendar(fragments: Iterable[str]) -> str:
+    """Combine folded VEVENT fragments into one VCALENDAR."""
+    return CRLF.join((*CALENDAR_HEADER, *fragments, *CALENDAR_FOOTER))
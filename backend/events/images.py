@@ -0,0 +1,130 @@
+"""
+Responsive renditions of event images.
+
+Uploads are re-encoded into a few bounded widths, without the metadata of the
+original, in WebP, AVIF (when Pillow is built with it) and a JPEG fallback.
+"""
+import posixpath
+from io import BytesIO
+from uuid import UUID
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+from .models import Event
+
+IMAGE_ROOT = 'event_images'
+RENDITION_ROOT = f'{IMAGE_ROOT}/renditions'
+# Rendition name and its maximum width and height in pixels
+RENDITIONS = (
+    ('thumbnail', 320),
+    ('card', 800),
+    ('full', 1920),
+)
+# Pillow format name, file extension and encoder options
+FORMATS = {
+    'avif': ('AVIF', 'avif', {'quality': 55}),
+    'webp': ('WEBP', 'webp', {'quality': 78, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+FALLBACK_FORMAT = 'jpeg'
+
+
+def available_formats() -> list[str]:
+    return [name for name in FORMATS if name != 'avif' or features.check('avif')]
+
+
+def rendition_dir(event) -> str:
+    return f'{RENDITION_ROOT}/{event.uuid}'
+
+
+def load(file) -> Image.Image:
+    """Open an upload, apply its EXIF orientation and drop everything else."""
+    image = Image.open(file)
+    largest = RENDITIONS[-1][1]
+    # Lets the JPEG decoder skip straight to a smaller scale
+    image.draft('RGB', (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    # Converting builds a new image, which leaves EXIF, XMP and ICC data behind
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+def encode(image, format_name) -> bytes:
+    pil_format, _, options = FORMATS[format_name]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def make_renditions(event, storage) -> dict:
+    """
+    Write every rendition of the event's current image to ``storage``.
+
+    Returns ``{rendition: {'width': w, 'height': h, <format>: path, ...}}``.
+    """
+    with event.image.open('rb') as file:
+        source = load(file)
+    directory = rendition_dir(event)
+    formats = available_formats()
+    renditions = {}
+    for name, size in RENDITIONS:
+        image = source.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        entry = {'width': image.width, 'height': image.height}
+        for format_name in formats:
+            extension = FORMATS[format_name][1]
+            path = posixpath.join(directory, f'{name}.{extension}')
+            entry[format_name] = storage.save(
+                path, ContentFile(encode(image, format_name)))
+        renditions[name] = entry
+    return renditions
+
+
+def rendition_paths(renditions) -> list[str]:
+    return [entry[format_name] for entry in renditions.values()
+            for format_name in FORMATS if format_name in entry]
+
+
+def _rendition_event(path) -> UUID | None:
+    """Return the uuid of the event a rendition path belongs to, if it is one."""
+    directory, _, rest = path.partition(f'{RENDITION_ROOT}/')
+    if directory or not rest:
+        return None
+    try:
+        return UUID(rest.split('/', 1)[0])
+    except ValueError:
+        return None
+
+
+def referenced(paths) -> set[str]:
+    """
+    Return the subset of ``paths`` still used by some event, as its image or
+    one of its renditions. Content-addressed files can be shared, so this is
+    checked before anything is deleted.
+    """
+    paths = set(paths)
+    used = set(Event.objects.filter(image__in=paths).values_list('image', flat=True))
+    uuids = {_rendition_event(path) for path in paths} - {None}
+    for renditions in (Event.objects.filter(uuid__in=uuids)
+                       .values_list('image_renditions', flat=True)):
+        used.update(rendition_paths(renditions))
+    return paths & used
+
+
+def srcset(renditions, url) -> dict:
+    """
+    Map each format to a srcset string, e.g.
+    ``{'webp': '<url> 320w, <url> 800w', ...}``. ``url`` turns a path into a URL.
+    """
+    result = {}
+    for format_name in FORMATS:
+        candidates = [f"{url(entry[format_name])} {entry['width']}w"
+                      for entry in renditions.values() if format_name in entry]
+        if candidates:
+            result[format_name] = ', '.join(candidates)
+    return result
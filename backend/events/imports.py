@@ -0,0 +1,140 @@
+"""
+Import of participants from a ``name,email`` CSV.
+
+The file is read as a stream and handled in chunks of CHUNK_SIZE rows, each
+validated as a whole, deduplicated against the event with one query and
+inserted with bulk_create, so memory use does not depend on the file size.
+"""
+import csv
+import io
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import EmailValidator
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Event, Participant, ParticipantImport
+from .signals import participants_bulk_created
+
+# Rows validated and inserted per transaction
+CHUNK_SIZE = 1000
+INSERT_BATCH_SIZE = 500
+MAX_ROWS = 100_000
+# Errors kept on the import for the organizer, the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+HEADER = ['name', 'email']
+NAME_MAX_LENGTH = Participant._meta.get_field('name').max_length  # noqa: SLF001
+
+
+def read_rows(text):
+    """
+    Yield ``(row number, fields)`` of a CSV text stream, skipping an optional
+    header and blank lines.
+    """
+    for number, fields in enumerate(csv.reader(text), start=1):
+        if not any(field.strip() for field in fields):
+            continue
+        if number == 1 and [field.strip().lower() for field in fields] == HEADER:
+            continue
+        yield number, fields
+
+
+def validate(rows) -> tuple[list, list]:
+    """Split a chunk into valid ``(row, name, email)`` and ``{'row', 'error'}``."""
+    validate_email = EmailValidator()
+    valid = []
+    errors = []
+    for number, fields in rows:
+        if len(fields) != len(HEADER):
+            errors.append({'row': number, 'error': "Expected a name and an email."})
+            continue
+        name, email = (field.strip() for field in fields)
+        if not name or len(name) > NAME_MAX_LENGTH:
+            errors.append({'row': number, 'error':
+                           f"Name must have 1 to {NAME_MAX_LENGTH} characters."})
+            continue
+        try:
+            validate_email(email)
+        except ValidationError as error:
+            errors.append({'row': number, 'error': error.messages[0]})
+            continue
+        valid.append((number, name, email))
+    return valid, errors
+
+
+def import_chunk(event_id, rows) -> tuple[int, int, list]:
+    """
+    Insert the valid rows of a chunk whose email is not taken yet.
+
+    Holds the event row lock, like waitlist promotion, so the seats counted
+    here cannot be taken meanwhile. Returns the number of created
+    participants and of duplicates, and the row errors.
+    """
+    valid, errors = validate(rows)
+    with transaction.atomic():
+        event = (Event.objects.select_for_update().filter(pk=event_id)
+                 .values('uuid', 'participants_limit', 'participant_count').get())
+        seen = set(Participant.objects
+                   .filter(event_id=event_id,
+                           email__in={email for _, _, email in valid})
+                   .values_list('email', flat=True))
+        new = []
+        for row in valid:
+            if row[2] not in seen:
+                seen.add(row[2])
+                new.append(row)
+        duplicates = len(valid) - len(new)
+        if event['participants_limit'] is not None:
+            seats = max(event['participants_limit'] - event['participant_count'], 0)
+            errors += [{'row': number, 'error': "The event is full."}
+                       for number, _, _ in new[seats:]]
+            new = new[:seats]
+        Participant.objects.bulk_create(
+            [Participant(event_id=event_id, name=name, email=email)
+             for _, name, email in new],
+            batch_size=INSERT_BATCH_SIZE)
+        participants_bulk_created(event_id, event['uuid'], len(new))
+    errors.sort(key=lambda error: error['row'])
+    return len(new), duplicates, errors
+
+
+def run(participant_import) -> None:
+    """Import a pending file chunk by chunk, saving the progress after each."""
+    imports = ParticipantImport.objects.filter(pk=participant_import.pk)
+    imports.update(status=ParticipantImport.Status.RUNNING)
+    progress = {'rows_processed': 0, 'created_count': 0,
+                'duplicate_count': 0, 'error_count': 0}
+    reported = []
+    with participant_import.file.open('rb') as file:
+        # Closes the file when collected, so it has to outlive the loop
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        rows = read_rows(text)
+        while chunk := list(islice(rows, CHUNK_SIZE)):
+            allowed = MAX_ROWS - progress['rows_processed']
+            truncated = len(chunk) > allowed
+            if truncated:
+                reported.append({'row': chunk[allowed][0], 'error':
+                                 f"Only the first {MAX_ROWS} rows are imported."})
+                progress['error_count'] += 1
+                chunk = chunk[:allowed]
+            created, duplicates, errors = import_chunk(participant_import.event_id,
+                                                       chunk)
+            progress['rows_processed'] += len(chunk)
+            progress['created_count'] += created
+            progress['duplicate_count'] += duplicates
+            progress['error_count'] += len(errors)
+            reported += errors[:MAX_REPORTED_ERRORS - len(reported)]
+            imports.update(bytes_processed=file.tell(), errors=reported, **progress)
+            if truncated:
+                break
+    imports.update(status=ParticipantImport.Status.DONE, finished_at=timezone.now(),
+                   bytes_processed=participant_import.size)
+
+
+def fail(participant_import, error) -> None:
+    """Stop an import, keeping what was imported and reporting why."""
+    imports = ParticipantImport.objects.filter(pk=participant_import.pk)
+    reported = imports.values_list('errors', flat=True).first() or []
+    imports.update(status=ParticipantImport.Status.FAILED, finished_at=timezone.now(),
+                   errors=[*reported, {'row': None, 'error': error}])
@@ -0,0 +1,144 @@
+import atexit
+import logging
+import smtplib
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+# Failures of the session itself, which a new connection may fix. Refusals and
+# other replies of the server, also OSErrors, are not retried.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                    ConnectionError, socket.timeout)
+
+
+class SendError(Exception):
+    """Raised when a batch could only be partially sent."""
+
+    def __init__(self, sent) -> None:
+        """Record how many messages were sent before the failure."""
+        super().__init__(f"Sending failed after {sent} messages")
+        self.sent = sent
+
+
+class _PooledConnection:
+    def __init__(self) -> None:
+        """Hold a lazily opened backend and the time it was last used."""
+        self.backend = None
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    def open(self) -> BaseEmailBackend:
+        if self.backend is None:
+            self.backend = get_connection(fail_silently=False)
+            self.backend.open()
+        return self.backend
+
+    def close(self) -> None:
+        if self.backend is not None:
+            try:
+                self.backend.close()
+            except Exception:
+                logger.exception("Error closing email connection")
+            self.backend = None
+
+    def is_idle(self, timeout) -> bool:
+        return self.backend is not None and time.monotonic() - self.last_used > timeout
+
+
+class EmailConnectionPool:
+    """
+    Keeps one open email backend connection per worker thread, so consecutive
+    actor invocations reuse the SMTP session instead of reconnecting for every
+    message. Connections idle for longer than EMAIL_CONNECTION_IDLE_TIMEOUT
+    seconds are closed by a background reaper.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty pool; connections are opened on first use."""
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    @property
+    def idle_timeout(self):
+        return settings.EMAIL_CONNECTION_IDLE_TIMEOUT
+
+    @contextmanager
+    def lease(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = _PooledConnection()
+            with self._lock:
+                self._connections.append(connection)
+                self._start_reaper()
+        with connection.lock:
+            if connection.is_idle(self.idle_timeout):
+                connection.close()
+            try:
+                yield connection
+            finally:
+                connection.last_used = time.monotonic()
+
+    def send_messages(self, messages):
+        """
+        Send messages over the calling thread's connection, reconnecting once
+        per message if the server dropped the session.
+        """
+        sent = 0
+        with self.lease() as connection:
+            for message in messages:
+                try:
+                    sent += self._send(connection, message)
+                except Exception as e:  # noqa: PERF203
+                    raise SendError(sent) from e
+        return sent
+
+    def _send(self, connection, message) -> int:
+        try:
+            return connection.open().send_messages([message])
+        except RECONNECT_ERRORS:
+            logger.warning("Email connection lost, reconnecting")
+            connection.close()
+            return connection.open().send_messages([message])
+
+    def close_idle(self):
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            if connection.lock.acquire(blocking=False):
+                try:
+                    if connection.is_idle(self.idle_timeout):
+                        connection.close()
+                finally:
+                    connection.lock.release()
+
+    def close_all(self):
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            with connection.lock:
+                connection.close()
+
+    def _start_reaper(self) -> None:
+        if self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap, daemon=True,
+                                        name='email-connection-reaper')
+        self._reaper.start()
+
+    def _reap(self) -> None:
+        while True:
+            time.sleep(max(self.idle_timeout / 2, 1))
+            self.close_idle()
+
+
+connection_pool = EmailConnectionPool()
+atexit.register(connection_pool.close_all)
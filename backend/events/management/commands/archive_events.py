@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from events import archive
+from events.tasks import archive_expired_events_task
+
+
+class Command(BaseCommand):
+    help = ("Move events that ended longer ago than the retention period, with "
+            "their participants and comments, to the archive tables.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help="Retention period, EVENT_RETENTION_DAYS by default")
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.EVENT_ARCHIVE_BATCH_SIZE,
+                            help="Expired events selected per query")
+        parser.add_argument('--enqueue', action='store_true',
+                            help="Leave archiving with the default settings "
+                                 "to a worker")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        if options['enqueue']:
+            archive_expired_events_task.send()
+            self.stdout.write("Enqueued archiving of expired events.")
+            return
+        before = archive.cutoff(options['days'])
+        if options['dry_run']:
+            count = archive.expired(before).count()
+            self.stdout.write(f"Would archive {count} events.")
+            return
+        count = archive.archive(before, options['batch_size'])
+        self.stdout.write(f"Archived {count} events.")
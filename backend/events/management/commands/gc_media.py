@@ -0,0 +1,67 @@
+import datetime as dt
+import posixpath
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from events import images, uploads
+from events.models import ImageUpload
+
+
+def walk(storage, directory):
+    """Yield the paths of all files below ``directory``."""
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from walk(storage, posixpath.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = ("Delete event images and renditions that no event references, "
+            "and image uploads that were abandoned.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--min-age', type=int, default=3600, metavar='SECONDS',
+                            help="Keep files modified more recently, which may "
+                                 "belong to uploads not committed yet")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        self.collect_uploads(dry_run=options['dry_run'])
+        self.collect_media(options['batch_size'], options['min_age'],
+                           dry_run=options['dry_run'])
+
+    def collect_uploads(self, *, dry_run):
+        cutoff = timezone.now() - dt.timedelta(hours=settings.IMAGE_UPLOAD_EXPIRY_HOURS)
+        expired = ImageUpload.objects.filter(created_at__lt=cutoff)
+        count = 0
+        for upload in expired.iterator():
+            if not dry_run:
+                uploads.discard(upload)
+            count += 1
+        verb = "Would remove" if dry_run else "Removed"
+        self.stdout.write(f"{verb} {count} expired uploads.")
+
+    def collect_media(self, batch_size, min_age, *, dry_run):
+        storage = default_storage
+        if not storage.exists(images.IMAGE_ROOT):
+            self.stdout.write("No media to collect.")
+            return
+        cutoff = timezone.now() - dt.timedelta(seconds=min_age)
+        paths = walk(storage, images.IMAGE_ROOT)
+        scanned = deleted = 0
+        while batch := list(islice(paths, batch_size)):
+            scanned += len(batch)
+            old = [path for path in batch if storage.get_modified_time(path) < cutoff]
+            unused = sorted(set(old) - images.referenced(old))
+            if not dry_run:
+                for path in unused:
+                    storage.delete(path)
+            deleted += len(unused)
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(f"{verb} {deleted} of {scanned} files.")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from events.models import Event
+from events.tasks import purge_event_task
+
+
+class Command(BaseCommand):
+    help = ("Remove deleted events whose purge job was lost, notifying their "
+            "remaining participants.")
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        events = (Event.all_objects.filter(deleted_at__isnull=False)
+                  .values_list('id', flat=True))
+        count = 0
+        for event_id in events.iterator():
+            purge_event_task(event_id)
+            count += 1
+        self.stdout.write(f"Purged {count} events.")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from events.counters import recount
+from events.models import Comment, Event, Participant
+
+
+class Command(BaseCommand):
+    help = "Recompute the participant and comment counters of events."
+
+    def add_arguments(self, parser):
+        parser.add_argument('events', nargs='*', metavar='uuid',
+                            help="Only recount these events")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        events = Event.objects.all()
+        if options['events']:
+            events = events.filter(uuid__in=options['events'])
+        updated = recount(events, Participant, Comment, options['batch_size'])
+        self.stdout.write(f"Recounted {updated} events.")
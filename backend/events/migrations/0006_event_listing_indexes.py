@@ -0,0 +1,36 @@
+# Generated by Django 5.0 on 2026-10-17 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_personalizedinvitation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='description',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='link',
+            field=models.URLField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='organizer_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['event', 'date', 'id'], name='comment_event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['event', 'id'], name='participant_event_id_idx'),
+        ),
+    ]
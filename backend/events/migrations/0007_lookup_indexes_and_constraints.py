@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-17 18:57
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_participants(apps, schema_editor):  # noqa: ARG001
+    """
+    Keep the first participant per event and email, moving the comments of the
+    later ones to it, so the unique constraint can be added.
+    """
+    Participant = apps.get_model('events', 'Participant')
+    Comment = apps.get_model('events', 'Comment')
+    duplicates = (Participant.objects.values('event', 'email').order_by()
+                  .annotate(first_id=Min('id'), count=Count('id'))
+                  .filter(count__gt=1))
+    for row in duplicates.iterator():
+        later = Participant.objects.filter(
+            event=row['event'], email=row['email'], id__gt=row['first_id'])
+        Comment.objects.filter(author__in=later).update(author=row['first_id'])
+        later.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_participants, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['event', 'parent', 'date'], name='comment_event_parent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='participant',
+            constraint=models.UniqueConstraint(fields=('event', 'email'), name='unique_participant_email_per_event'),
+        ),
+    ]
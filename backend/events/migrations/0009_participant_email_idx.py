@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-17 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_event_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['email'], name='participant_email_idx'),
+        ),
+    ]
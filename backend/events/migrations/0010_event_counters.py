@@ -0,0 +1,44 @@
+# Generated by Django 5.0 on 2026-10-17 19:06
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def populate_counters(apps, schema_editor):  # noqa: ARG001
+    Event = apps.get_model('events', 'Event')
+    counts = {}
+    for field, model_name in (('participant_count', 'Participant'),
+                              ('comment_count', 'Comment')):
+        rows = (apps.get_model('events', model_name).objects
+                .filter(event=OuterRef('pk')).order_by()
+                .values('event').annotate(count=Count('pk')).values('count'))
+        counts[field] = Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+    last_id = 0
+    while ids := list(Event.objects.filter(pk__gt=last_id).order_by('pk')
+                      .values_list('pk', flat=True)[:BATCH_SIZE]):
+        Event.objects.filter(pk__in=ids).update(**counts)
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_participant_email_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_event_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='image',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to='event_images/'),
+        ),
+    ]
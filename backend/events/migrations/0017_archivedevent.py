@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-17 19:47
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0016_event_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('uuid', models.UUIDField(editable=False, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('location', models.CharField(max_length=255)),
+                ('start_datetime', models.DateTimeField()),
+                ('end_datetime', models.DateTimeField()),
+                ('organizer_email', models.EmailField(max_length=254)),
+                ('organizer_name', models.CharField(blank=True, default='', max_length=255)),
+                ('description', models.TextField(blank=True, default='')),
+                ('link', models.URLField(blank=True, default='')),
+                ('participants_limit', models.PositiveIntegerField(blank=True, null=True)),
+                ('participants', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('comments', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0 on 2026-10-17 19:49
+
+import events.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_archivedevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='uuid',
+            field=models.UUIDField(default=events.uuids.uuid7, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='uuid',
+            field=models.UUIDField(default=events.uuids.uuid7, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='imageupload',
+            name='uuid',
+            field=models.UUIDField(default=events.uuids.uuid7, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='invitation',
+            name='uuid',
+            field=models.UUIDField(default=events.uuids.uuid7, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='participant',
+            name='uuid',
+            field=models.UUIDField(default=events.uuids.uuid7, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='participantimport',
+            name='uuid',
+            field=models.UUIDField(default=events.uuids.uuid7, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='personalizedinvitation',
+            name='uuid',
+            field=models.UUIDField(default=events.uuids.uuid7, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='waitlistentry',
+            name='uuid',
+            field=models.UUIDField(default=events.uuids.uuid7, editable=False, unique=True),
+        ),
+    ]
@@ -1,11 +1,22 @@
 from uuid import uuid4
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
+from .storage import private_storage
+from .uuids import uuid7
+
+
+class EventManager(models.Manager):
+    """Leaves out deleted events, which only ``Event.all_objects`` still returns."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
 class Event(models.Model):
     id = models.AutoField(primary_key=True)
-    uuid = models.UUIDField(default=uuid4, editable=False, unique=True)
+    uuid = models.UUIDField(default=uuid7, editable=False, unique=True)
     edit_uuid = models.UUIDField(default=uuid4, editable=False, unique=True)
     name = models.CharField(max_length=255)
     location = models.CharField(max_length=255)
@@ -14,29 +25,149 @@ class Event(models.Model):
     organizer_email = models.EmailField()
     description = models.TextField(blank=True, default="")
     link = models.URLField(blank=True, default="")
-    image = models.ImageField(upload_to='event_images/', blank=True, null=True)
+    image = models.ImageField(upload_to='event_images/', max_length=255,
+                              blank=True, null=True)
     organizer_name = models.CharField(max_length=255, blank=True, default="")
     participants_limit = models.PositiveIntegerField(blank=True, null=True)
+    # Bumped whenever the event, its participants or its comments change
+    updated_at = models.DateTimeField(auto_now=True)
+    # Kept in sync by events.signals; repair with `manage.py recount_event_counters`
+    participant_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Written by the image processing job, see events.images
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # Set when the organizer deletes the event, whose rows are then removed
+    # by the purge job, see events.purge
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    # Maintained outside of the model instance by F() updates and background jobs
+    background_fields = ('participant_count', 'comment_count', 'image_renditions',
+                         'deleted_at')
+
+    objects = EventManager()
+    all_objects = models.Manager()  # noqa: DJ012
 
     def __str__(self) -> str:
         return f"{self.name} ({self.start_datetime.strftime('%Y-%m-%d %H:%M')})"
 
+    def save(self, *args, **kwargs):
+        """
+        Leave the fields maintained in the background alone on update, so
+        concurrent F() increments and image processing results survive. The
+        image is only written when it was replaced on this instance.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            skipped = set(self.background_fields)
+            if getattr(self, '_loaded_image', None) == self.image.name:
+                skipped.add('image')
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped]
+        super().save(*args, **kwargs)
+        self._loaded_image = self.image.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values) -> 'Event':
+        instance = super().from_db(db, field_names, values)
+        if 'image' not in instance.get_deferred_fields():
+            instance._loaded_image = instance.image.name  # noqa: SLF001
+        return instance
+
 
 class Participant(models.Model):
     id = models.AutoField(primary_key=True)
-    uuid = models.UUIDField(default=uuid4, editable=False, unique=True)
+    uuid = models.UUIDField(default=uuid7, editable=False, unique=True)
     event = models.ForeignKey(Event, on_delete=models.CASCADE,
                               related_name='participants')
     name = models.CharField(max_length=255)
     email = models.EmailField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'id'], name='participant_event_id_idx'),
+            models.Index(fields=['email'], name='participant_email_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'email'],
+                                    name='unique_participant_email_per_event'),
+        ]
+
     def __str__(self) -> str:
         return f"{self.name} <{self.email}>"
 
 
+class WaitlistEntry(models.Model):
+    id = models.AutoField(primary_key=True)
+    uuid = models.UUIDField(default=uuid7, editable=False, unique=True)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist')
+    name = models.CharField(max_length=255)
+    email = models.EmailField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'waitlist entries'
+        indexes = [
+            models.Index(fields=['event', 'id'], name='waitlist_event_id_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'email'],
+                                    name='unique_waitlist_email_per_event'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} <{self.email}> waiting for {self.event.name}"
+
+
+class ImageUpload(models.Model):
+    """An event image being uploaded in chunks, see events.uploads."""
+
+    id = models.AutoField(primary_key=True)
+    uuid = models.UUIDField(default=uuid7, editable=False, unique=True)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    # Known once enough of the file arrived to read its header
+    format = models.CharField(max_length=10, blank=True, default="")
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"Upload {self.uuid} ({self.received}/{self.size} bytes)"
+
+
+class ParticipantImport(models.Model):
+    """A CSV of participants imported by a background job, see events.imports."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        DONE = 'done'
+        FAILED = 'failed'
+
+    id = models.AutoField(primary_key=True)
+    uuid = models.UUIDField(default=uuid7, editable=False, unique=True)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='imports')
+    file = models.FileField(upload_to='imports/', storage=private_storage)
+    size = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=Status, default=Status.PENDING)
+    bytes_processed = models.PositiveBigIntegerField(default=0)
+    rows_processed = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    # The first errors as {'row': number, 'error': message}
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"Import {self.uuid} into {self.event.name} ({self.status})"
+
+
 class Invitation(models.Model):
     id = models.AutoField(primary_key=True)
-    uuid = models.UUIDField(default=uuid4, editable=False, unique=True)
+    uuid = models.UUIDField(default=uuid7, editable=False, unique=True)
     event = models.ForeignKey(Event, on_delete=models.CASCADE,
                               related_name='invitations')
 
@@ -46,7 +177,7 @@ class Invitation(models.Model):
 
 class PersonalizedInvitation(models.Model):
     id = models.AutoField(primary_key=True)
-    uuid = models.UUIDField(default=uuid4, editable=False, unique=True)
+    uuid = models.UUIDField(default=uuid7, editable=False, unique=True)
     event = models.ForeignKey(Event, on_delete=models.CASCADE,
                               related_name='personalized_invitations')
     name = models.CharField(max_length=255)
@@ -56,7 +187,7 @@ class PersonalizedInvitation(models.Model):
 
 class Comment(models.Model):
     id = models.AutoField(primary_key=True)
-    uuid = models.UUIDField(default=uuid4, editable=False, unique=True)
+    uuid = models.UUIDField(default=uuid7, editable=False, unique=True)
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='comments')
     parent = models.ForeignKey('self', on_delete=models.CASCADE, related_name='replies',
                                blank=True, null=True)
@@ -64,6 +195,40 @@ class Comment(models.Model):
     content = models.TextField()
     date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'date', 'id'], name='comment_event_date_idx'),
+            models.Index(fields=['event', 'parent', 'date'],
+                         name='comment_event_parent_idx'),
+        ]
+
     def __str__(self) -> str:
         return f"Comment by {self.author.name} on \
             {self.date.strftime('%Y-%m-%d %H:%M')}"
+
+
+class ArchivedEvent(models.Model):
+    """
+    A past event moved out of the live tables, see events.archive. Its
+    participants and comments are kept as lists of rows, in the column order
+    of the matching export in events.exports.
+    """
+
+    id = models.AutoField(primary_key=True)
+    uuid = models.UUIDField(editable=False, unique=True)
+    name = models.CharField(max_length=255)
+    location = models.CharField(max_length=255)
+    start_datetime = models.DateTimeField()
+    end_datetime = models.DateTimeField()
+    organizer_email = models.EmailField()
+    organizer_name = models.CharField(max_length=255, blank=True, default="")
+    description = models.TextField(blank=True, default="")
+    link = models.URLField(blank=True, default="")
+    participants_limit = models.PositiveIntegerField(blank=True, null=True)
+    participants = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    comments = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        start = self.start_datetime.strftime('%Y-%m-%d %H:%M')
+        return f"{self.name} ({start}, archived)"
@@ -0,0 +1,29 @@
+from rest_framework.pagination import CursorPagination
+
+
+class EventListCursorPagination(CursorPagination):
+    # Set when the request cursor belongs to another list, to start from the top
+    ignore_request_cursor = False
+
+    def decode_cursor(self, request):
+        if self.ignore_request_cursor:
+            return None
+        return super().decode_cursor(request)
+
+
+class CommentCursorPagination(EventListCursorPagination):
+    """Keyset pagination over comments of an event, oldest first."""
+
+    ordering = ('date', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ParticipantCursorPagination(EventListCursorPagination):
+    """Keyset pagination over participants of an event, in join order."""
+
+    ordering = ('id',)
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
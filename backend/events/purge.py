@@ -0,0 +1,87 @@
+"""
+Removal of deleted and archived events in the background.
+
+Deleting an event only sets its ``deleted_at``, which hides it from
+``Event.objects`` at once. ``purge`` then removes its rows a chunk at a time
+with plain DELETE statements, skipping Django's cascade collector, which
+would load every related row first, and the signal handlers, whose counter
+and cache bookkeeping is moot for a deleted event.
+"""
+from django.db import transaction
+
+from .models import (
+    Comment,
+    Event,
+    Invitation,
+    Participant,
+    ParticipantImport,
+    PersonalizedInvitation,
+    WaitlistEntry,
+)
+from .storage import private_storage
+
+# Rows deleted per statement and transaction
+CHUNK_SIZE = 1000
+# Children of an event deleted after its comments and participants
+OTHER_CHILDREN = (WaitlistEntry, Invitation, PersonalizedInvitation, ParticipantImport)
+
+
+def raw_delete(queryset) -> int:
+    """Delete the rows of a queryset with one statement, without cascades or signals."""
+    return queryset._raw_delete(queryset.db)  # noqa: SLF001
+
+
+def delete_chunks(queryset, order='id', before_delete=None) -> int:
+    """
+    Delete the rows of a queryset CHUNK_SIZE at a time in ``order``, passing
+    each chunk to ``before_delete`` first, in the same transaction.
+    """
+    deleted = 0
+    while ids := list(queryset.order_by(order)
+                      .values_list('id', flat=True)[:CHUNK_SIZE]):
+        chunk = queryset.filter(id__in=ids)
+        with transaction.atomic():
+            if before_delete is not None:
+                before_delete(chunk)
+            deleted += raw_delete(chunk)
+    return deleted
+
+
+def detach_other_replies(comments) -> None:
+    """
+    Detach the replies to a chunk of comments that are not in it. Replies are
+    created after their parent, so deleting from the highest id down removes
+    them first, except one moved under a newer comment, e.g. in the admin.
+    """
+    (Comment.objects.filter(parent__in=comments).exclude(id__in=comments)
+     .update(parent=None))
+
+
+def delete_import_files(participant_imports) -> None:
+    storage = private_storage()
+    for name in participant_imports.exclude(file='').values_list('file', flat=True):
+        storage.delete(name)
+
+
+def purge(event_id, notify=None) -> dict:
+    """
+    Remove an event and everything belonging to it. A ``notify`` callable is
+    passed the ``(email, name)`` pairs of each chunk of participants before
+    it is deleted, so no one is notified twice when a purge resumes.
+    Returns the number of deleted rows per model.
+    """
+    def notify_chunk(chunk) -> None:
+        if notify is not None:
+            notify(list(chunk.values_list('email', 'name')))
+
+    deleted = {}
+    deleted['Comment'] = delete_chunks(Comment.objects.filter(event_id=event_id),
+                                       '-id', detach_other_replies)
+    deleted['Participant'] = delete_chunks(
+        Participant.objects.filter(event_id=event_id), before_delete=notify_chunk)
+    for model in OTHER_CHILDREN:
+        before_delete = delete_import_files if model is ParticipantImport else None
+        deleted[model.__name__] = delete_chunks(
+            model.objects.filter(event_id=event_id), before_delete=before_delete)
+    deleted['Event'] = raw_delete(Event.all_objects.filter(pk=event_id))
+    return deleted
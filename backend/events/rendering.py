@@ -0,0 +1,58 @@
+from functools import cache
+from uuid import uuid4
+
+from django.template.loader import get_template
+from django.utils.html import conditional_escape
+
+
+class EmailTemplate:
+    """Text and HTML variant of an email, compiled once per process."""
+
+    def __init__(self, name) -> None:
+        """Load and compile ``<name>.txt`` and ``<name>.html``."""
+        self.name = name
+        self.text = get_template(f'{name}.txt')
+        self.html = get_template(f'{name}.html')
+
+    def render(self, context):
+        return self.text.render(context), self.html.render(context)
+
+    def broadcast(self, context, field='participant_name'):
+        """
+        Render the parts shared by all recipients once.
+        The returned Broadcast only substitutes ``field`` per recipient.
+        """
+        return Broadcast(self, context, field)
+
+
+class Broadcast:
+    def __init__(self, template, context, field) -> None:
+        """Render the template once with a placeholder in place of ``field``."""
+        self.template = template
+        self.context = context
+        self.field = field
+        placeholder = uuid4().hex
+        text, html = template.render({**context, field: placeholder})
+        self.parts = (text.split(placeholder), html.split(placeholder))
+        self.verified = False
+
+    def render(self, value):
+        """Return the (text, html) content for a recipient."""
+        if self.parts is None:
+            return self.template.render({**self.context, self.field: value})
+        escaped = conditional_escape(value)
+        rendered = tuple(escaped.join(parts) for parts in self.parts)
+        if not self.verified:
+            # Filters applied to the field would not survive the placeholder,
+            # so compare against a full render once before trusting the split.
+            self.verified = True
+            expected = self.template.render({**self.context, self.field: value})
+            if rendered != expected:
+                self.parts = None
+                return expected
+        return rendered
+
+
+@cache
+def email_template(name):
+    return EmailTemplate(name)
@@ -0,0 +1,69 @@
+"""
+Routing of reads to database replicas.
+
+Requests with a safe method read from a random alias in DATABASE_REPLICAS.
+Everything else, including dramatiq workers and management commands, uses
+the primary. A client that sent a mutation gets a short-lived cookie that
+keeps its reads on the primary until the replicas have caught up, so it
+always sees its own writes.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Let reads in the enclosed block go to a replica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):  # noqa: ARG002
+        # Reads in a transaction see its writes and may lock rows
+        if (_replica_reads.get() and settings.DATABASE_REPLICAS
+                and not connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):  # noqa: ARG002
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):  # noqa: ARG002
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):  # noqa: ARG002
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """Read from the replicas during safe requests of clients without pending writes."""
+
+    def __init__(self, get_response) -> None:
+        """Wrap the next handler of the middleware chain."""
+        self.get_response = get_response
+
+    def __call__(self, request) -> HttpResponse:
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if settings.DATABASE_REPLICAS:
+                response.set_cookie(settings.REPLICA_STICKY_COOKIE, '1',
+                                    max_age=settings.REPLICA_STICKY_SECONDS,
+                                    httponly=True, samesite='Lax')
+            return response
+        if request.COOKIES.get(settings.REPLICA_STICKY_COOKIE):
+            return self.get_response(request)
+        with replica_reads():
+            return self.get_response(request)
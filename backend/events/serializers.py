@@ -1,7 +1,44 @@
-from django.db import transaction
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import prefetch_related_objects
+from django.urls import reverse
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-
-from .models import Comment, Event, Invitation, Participant, PersonalizedInvitation
+from rest_framework.settings import api_settings
+
+from . import archive, images, uploads, waitlist
+from .comment_tree import CommentTree
+from .counters import add_participant
+from .exceptions import EventFull
+from .models import (
+    ArchivedEvent,
+    Comment,
+    Event,
+    ImageUpload,
+    Invitation,
+    Participant,
+    ParticipantImport,
+    PersonalizedInvitation,
+    WaitlistEntry,
+)
+from .pagination import CommentCursorPagination, ParticipantCursorPagination
+from .tasks import promote_waitlist_task
+
+
+def absolute_media_url(request, path):
+    if request is not None:
+        return request.build_absolute_uri(path).replace(
+            'http://localhost:8000', 'http://localhost')
+    return f"http://localhost{path}"
+
+
+def image_srcset(request, renditions) -> dict:
+    """Map each image format to a srcset string of absolute rendition URLs."""
+    return images.srcset(
+        renditions, lambda path: absolute_media_url(request, default_storage.url(path)))
 
 
 class ParticipantSerializer(serializers.ModelSerializer):
@@ -10,6 +47,12 @@ class ParticipantSerializer(serializers.ModelSerializer):
         fields = ['name', 'id', 'email']
 
 
+def validate_event_edit_uuid(attrs):
+    if str(attrs['event'].edit_uuid) != str(attrs.get('event_edit_uuid')):
+        msg = "Event edit uuid does not match."
+        raise serializers.ValidationError(msg)
+
+
 class InvitationCreateSerializer(serializers.ModelSerializer):
     event = serializers.SlugRelatedField(slug_field='uuid',
                                          queryset=Event.objects.all(), many=False)
@@ -21,11 +64,7 @@ class InvitationCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ['uuid']
 
     def validate(self, attrs):
-        event = attrs['event']
-        event_edit_uuid = attrs.get('event_edit_uuid')
-        if str(event.edit_uuid) != str(event_edit_uuid):
-            msg = "Event edit uuid does not match."
-            raise serializers.ValidationError(msg)
+        validate_event_edit_uuid(attrs)
         return attrs
 
     def create(self, validated_data):
@@ -41,6 +80,37 @@ class PersInvCreateSerializer(InvitationCreateSerializer):
                                                        name=validated_data['name'])
 
 
+class GuestSerializer(serializers.Serializer):
+    uuid = serializers.UUIDField(read_only=True)
+    name = serializers.CharField(max_length=255)
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+
+
+class PersInvBulkCreateSerializer(serializers.Serializer):
+    """Creates personalized invitations for many guests at once."""
+
+    max_guests = 1000
+
+    event = serializers.SlugRelatedField(slug_field='uuid',
+                                         queryset=Event.objects.all())
+    event_edit_uuid = serializers.UUIDField(write_only=True)
+    guests = GuestSerializer(many=True, allow_empty=False, max_length=max_guests)
+
+    def validate(self, attrs):
+        validate_event_edit_uuid(attrs)
+        return attrs
+
+    def create(self, validated_data):
+        event = validated_data['event']
+        invitations = PersonalizedInvitation.objects.bulk_create(
+            PersonalizedInvitation(event=event, name=guest['name'])
+            for guest in validated_data['guests'])
+        guests = [{**guest, 'uuid': invitation.uuid}
+                  for guest, invitation in zip(validated_data['guests'], invitations,
+                                                strict=True)]
+        return {'event': event, 'guests': guests}
+
+
 class CommentSerializer(serializers.ModelSerializer):
     """Used for creating and retrieving comments."""
 
@@ -52,11 +122,12 @@ class CommentSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='name', read_only=True)
     author_uuid = serializers.UUIDField(write_only=True)
     replies = serializers.SerializerMethodField()
+    more_replies = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
         fields = ['uuid', 'event', 'parent', 'author', 'content',
-                  'date', 'author_uuid', 'replies']
+                  'date', 'author_uuid', 'replies', 'more_replies']
         read_only_fields = ['uuid', 'author', 'date']
 
     def validate(self, attrs):
@@ -64,35 +135,82 @@ class CommentSerializer(serializers.ModelSerializer):
         parent = attrs.get('parent')
         author_uuid = attrs.get('author_uuid')
 
-        if not event.participants.filter(uuid=author_uuid).exists():
+        author = event.participants.filter(uuid=author_uuid).first()
+        if author is None:
             msg = "Author must be a participant of the event."
             raise serializers.ValidationError(msg)
-        if (parent is not None) and (parent.event != event):
+        if (parent is not None) and (parent.event_id != event.id):
             msg = "Parent comment does not exist in this event."
             raise serializers.ValidationError(msg)
+        attrs['author'] = author
         return attrs
 
     def create(self, validated_data):
-        validated_data['author'] = Participant.objects.get(
-            uuid=validated_data.pop('author_uuid'))
+        validated_data.pop('author_uuid')
         return Comment.objects.create(**validated_data)
 
     def get_replies(self, obj):
-        return CommentSerializer(obj.replies.all(), many=True).data
+        tree = self.context.get('comment_tree')
+        if tree is None:
+            return CommentSerializer(obj.replies.all(), many=True,
+                                     context=self.context).data
+        depth = self.context.get('depth', 0)
+        context = {**self.context, 'depth': depth + 1}
+        return CommentSerializer(tree.replies(obj, depth), many=True,
+                                 context=context).data
+
+    def get_more_replies(self, obj) -> int:
+        tree = self.context.get('comment_tree')
+        if tree is None:
+            return 0
+        return tree.hidden_replies(obj, self.context.get('depth', 0))
 
 
-class EventAdminSerializer(serializers.ModelSerializer):
+class CommentTreeQuerySerializer(serializers.Serializer):
+    """Limits applied when listing a comment tree."""
+
+    depth = serializers.IntegerField(min_value=0, required=False)
+    replies = serializers.IntegerField(min_value=0, required=False)
+
+
+class EventPrefetchMixin:
+    """Loads the related rows needed by the serializer in a constant number of queries."""  # noqa: E501
+
+    prefetch_lookups = ()
+
+    @classmethod
+    def get_prefetch_lookups(cls) -> list:
+        return list(cls.prefetch_lookups)
+
+    def to_representation(self, instance):
+        prefetch_related_objects([instance], *self.get_prefetch_lookups())
+        return super().to_representation(instance)
+
+    @extend_schema_field(CommentSerializer(many=True))
+    def get_comments(self, obj):
+        tree = CommentTree.for_event(obj)
+        context = {**self.context, 'comment_tree': tree}
+        return CommentSerializer(tree.comments, many=True, context=context).data
+
+
+class EventAdminSerializer(EventPrefetchMixin, serializers.ModelSerializer):
     """Used for creating, editing events and for retrieving them as admin of the event."""  # noqa: E501
 
     participants = ParticipantSerializer(many=True, read_only=True)
     invitations = InvitationCreateSerializer(many=True, read_only=True)
     personalized_invitations = PersInvCreateSerializer(many=True, read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    image_upload = serializers.SlugRelatedField(
+        slug_field='uuid', write_only=True, required=False,
+        queryset=ImageUpload.objects.filter(completed_at__isnull=False),
+        help_text="A completed upload to use as image, instead of sending it")
+    prefetch_lookups = ('participants', 'invitations', 'personalized_invitations')
     read_only_fields = ['id', 'uuid', 'edit_uuid']
 
     class Meta:
         model = Event
-        fields = "__all__"
+        exclude = ['image_renditions']
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
@@ -108,11 +226,15 @@ class EventAdminSerializer(serializers.ModelSerializer):
 
         return representation
 
+    def get_image_srcset(self, obj) -> dict:
+        return image_srcset(self.context.get('request'), obj.image_renditions)
+
     def validate_participants_limit(self, value):
         if value is not None and value < 1:
             msg = "Participants limit must be greater than 0."
             raise serializers.ValidationError(msg)
-        if self.instance and value < self.instance.participants.count():
+        if self.instance and value is not None and \
+                value < self.instance.participant_count:
             msg = "Participants limit must be greater than participants count."
             raise serializers.ValidationError(msg)
         return value
@@ -122,56 +244,164 @@ class EventAdminSerializer(serializers.ModelSerializer):
             attrs['start_datetime'] >= attrs['end_datetime']:
                 msg = "End datetime must be after start datetime."
                 raise serializers.ValidationError(msg)
+        if attrs.get('image') and attrs.get('image_upload'):
+            msg = "Send either an image or an image upload, not both."
+            raise serializers.ValidationError(msg)
         return attrs
 
+    def save(self, **kwargs):
+        upload = self.validated_data.pop('image_upload', None)
+        if upload is None:
+            return super().save(**kwargs)
+        with uploads.open_file(upload) as file:
+            event = super().save(image=file, **kwargs)
+        uploads.discard(upload)
+        return event
 
-class EventSerializer(serializers.ModelSerializer):
+
+class EventSerializer(EventPrefetchMixin, serializers.ModelSerializer):
     """Used for retrieving events as a participant."""
 
     participants = ParticipantSerializer(many=True, read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    prefetch_lookups = ('participants',)
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
         fields = ['uuid', 'name', 'location', 'start_datetime', 'end_datetime',
                   'organizer_email', 'description', 'link', 'image', 'organizer_name',
-                  'participants_limit', 'participants', 'comments']
+                  'image_srcset', 'participants_limit', 'participant_count',
+                  'comment_count', 'participants', 'comments']
 
     def get_image(self, obj):
         if obj.image and hasattr(obj.image, 'url'):
-            request = self.context.get('request')
-            if request is not None:
-                return request.build_absolute_uri(obj.image.url).replace(
-                    'http://localhost:8000', 'http://localhost')
-            else:
-                return f"http://localhost{obj.image.url}"
+            return absolute_media_url(self.context.get('request'), obj.image.url)
         return None
 
+    def get_image_srcset(self, obj) -> dict:
+        return image_srcset(self.context.get('request'), obj.image_renditions)
+
+
+class CommentPageSerializer(CommentSerializer):
+    """Comment without nested replies, used by paginated listings."""
+
+    class Meta(CommentSerializer.Meta):
+        fields = ['uuid', 'event', 'parent', 'author', 'content', 'date']
+
+
+class EventSummarySerializer(EventSerializer):
+    """
+    Lightweight event payload with participant and comment counts
+    and only the first page of each list.
+    """
+
+    participants = serializers.SerializerMethodField()
+    comments = serializers.SerializerMethodField()
+    prefetch_lookups = ()
+
+    def get_first_page(self, obj, queryset, pagination_class, serializer_class,
+                       url_name):
+        request = self.context['request']
+        # Both lists start at their first page; a cursor in the request is
+        # one of the paginated endpoints and fits at most one of them
+        paginator = pagination_class()
+        paginator.ignore_request_cursor = True
+        page = paginator.paginate_queryset(queryset, request)
+        url = reverse(url_name, kwargs={'uuid': obj.uuid})
+        query = request.query_params.copy()
+        query.pop(paginator.cursor_query_param, None)
+        if query:
+            url = f"{url}?{query.urlencode()}"
+        paginator.base_url = request.build_absolute_uri(url)
+        return {
+            'next': paginator.get_next_link(),
+            'results': serializer_class(page, many=True, context=self.context).data,
+        }
+
+    def get_participants(self, obj) -> dict:
+        return self.get_first_page(obj, obj.participants.all(),
+                                   ParticipantCursorPagination, ParticipantSerializer,
+                                   'events:event-participants')
+
+    def get_comments(self, obj) -> dict:
+        return self.get_first_page(obj, obj.comments.select_related('author', 'parent'),
+                                   CommentCursorPagination, CommentPageSerializer,
+                                   'events:event-comments')
+
 
 class InvitationAcceptSerializer(serializers.ModelSerializer):
+    duplicate_participant_msg = (
+        "Participant with this email already exists in this event.")
+
     invitation = serializers.SlugRelatedField(slug_field='uuid', write_only=True,
-                                              queryset=Invitation.objects.all(),
+                                              queryset=Invitation.objects.filter(
+                                                  event__deleted_at__isnull=True)
+                                              .select_related('event'),
                                               many=False)
     event = serializers.SlugRelatedField(slug_field='uuid', read_only=True)
+    status = serializers.SerializerMethodField()
 
     class Meta:
         model = Participant
-        fields = ['uuid', 'event', 'name', 'email', 'invitation']
+        fields = ['uuid', 'event', 'name', 'email', 'invitation', 'status']
         read_only_fields = ['uuid']
 
-    def validate(self, attrs):
-        email = attrs.get('email')
-        event = attrs.get('invitation').event
-        if event.participants.filter(email=email).exists():
-            msg = "Participant with this email already exists in this event."
-            raise serializers.ValidationError(msg)
-        return attrs
+    def get_status(self, obj) -> str:
+        return 'waitlisted' if isinstance(obj, WaitlistEntry) else 'joined'
 
     def create(self, validated_data):
         invitation = validated_data.pop('invitation')
         validated_data['event'] = invitation.event
-        return Participant.objects.create(**validated_data)
+        return self.join(validated_data)
+
+    def join(self, validated_data, invitation=None):
+        """
+        Create a participant, or a waitlist entry if the event is full.
+        A personalized ``invitation`` is consumed either way.
+        """
+        try:
+            with self.guard_duplicate_email():
+                participant = add_participant(**validated_data)
+                if invitation is not None:
+                    invitation.delete()
+        except EventFull:
+            pass
+        else:
+            return participant
+
+        # A full event fails before the unique constraint can catch a duplicate,
+        # which must neither be waitlisted nor consume the invitation
+        if Participant.objects.filter(event=validated_data['event'],
+                                      email=validated_data['email']).exists():
+            raise self.duplicate_email_error()
+        msg = "This email is already on the waitlist of this event."
+        with self.guard_duplicate_email(msg):
+            entry = waitlist.join(**validated_data)
+            if invitation is not None:
+                invitation.delete()
+        # A seat may have been freed after the reservation failed
+        if waitlist.has_free_seats(entry.event_id):
+            promote_waitlist_task.send(event_id=entry.event_id)
+        return entry
+
+    @contextmanager
+    def guard_duplicate_email(self, msg=None):
+        """
+        Turn a violation of the per-event unique email constraint into
+        a validation error, instead of checking for duplicates before inserting.
+        """
+        try:
+            with transaction.atomic():
+                yield
+        except IntegrityError:
+            raise self.duplicate_email_error(msg) from None
+
+    def duplicate_email_error(self, msg=None) -> serializers.ValidationError:
+        # Raised from save(), so keyed like the errors of validate() used to be
+        msg = msg or self.duplicate_participant_msg
+        return serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [msg]})
 
 
 class InvitationDetailsSerializer(serializers.ModelSerializer):
@@ -185,7 +415,9 @@ class InvitationDetailsSerializer(serializers.ModelSerializer):
 
 class PersInvAcceptSerializer(InvitationAcceptSerializer):
     invitation = serializers.SlugRelatedField(slug_field='uuid', write_only=True,
-                                              queryset=PersonalizedInvitation.objects.all(),
+                                              queryset=PersonalizedInvitation.objects
+                                              .filter(event__deleted_at__isnull=True)
+                                              .select_related('event'),
                                               many=False)
     event = serializers.SlugRelatedField(slug_field='uuid', read_only=True)
 
@@ -196,10 +428,7 @@ class PersInvAcceptSerializer(InvitationAcceptSerializer):
         invitation = validated_data.pop('invitation')
         validated_data['event'] = invitation.event
         validated_data['name'] = invitation.name
-        with transaction.atomic():
-            participant = Participant.objects.create(**validated_data)
-            invitation.delete()
-        return participant
+        return self.join(validated_data, invitation)
 
 class PersInvDetailsSerializer(serializers.ModelSerializer):
     name = serializers.CharField(read_only=True)
@@ -210,3 +439,100 @@ class PersInvDetailsSerializer(serializers.ModelSerializer):
         model = PersonalizedInvitation
         fields = ['uuid', 'name', 'event_name', 'event_uuid']
         read_only_fields = ['uuid', 'name', 'event_name', 'event_uuid']
+
+
+class CalendarFeedSerializer(serializers.Serializer):
+    token = serializers.CharField()
+    url = serializers.URLField()
+
+
+class EventCacheStatsSerializer(serializers.Serializer):
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    hit_rate = serializers.FloatField(allow_null=True)
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source='received', read_only=True)
+    complete = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImageUpload
+        fields = ['uuid', 'size', 'offset', 'format', 'width', 'height', 'complete']
+        read_only_fields = ['format', 'width', 'height']
+
+    def get_complete(self, obj) -> bool:
+        return obj.completed_at is not None
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.IMAGE_UPLOAD_MAX_SIZE:
+            msg = f"Images may be at most {settings.IMAGE_UPLOAD_MAX_SIZE} bytes."
+            raise serializers.ValidationError(msg)
+        return value
+
+
+class ParticipantImportSerializer(serializers.ModelSerializer):
+    """Starts a CSV import of ``name,email`` rows and reports its progress."""
+
+    max_size = 20 * 1024 * 1024
+
+    file = serializers.FileField(write_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ParticipantImport
+        fields = ['uuid', 'file', 'status', 'progress', 'rows_processed',
+                  'created_count', 'duplicate_count', 'error_count', 'errors',
+                  'created_at', 'finished_at']
+        read_only_fields = [field for field in fields if field != 'file']
+
+    def get_progress(self, obj) -> float:
+        """Share of the file processed so far, between 0 and 1."""
+        if obj.status == ParticipantImport.Status.DONE:
+            return 1.0
+        if not obj.size:
+            return 0.0
+        return min(obj.bytes_processed / obj.size, 1.0)
+
+    def validate_file(self, value):
+        if value.size > self.max_size:
+            msg = f"The file may be at most {self.max_size // (1024 * 1024)} MiB."
+            raise serializers.ValidationError(msg)
+        return value
+
+    def create(self, validated_data):
+        return ParticipantImport.objects.create(
+            event=self.context['event'], file=validated_data['file'],
+            size=validated_data['file'].size)
+
+
+class ArchivedEventSerializer(serializers.ModelSerializer):
+    """Read-only view of an archived event, shaped like a live one."""
+
+    participant_count = serializers.SerializerMethodField()
+    comment_count = serializers.SerializerMethodField()
+    participants = serializers.SerializerMethodField()
+    comments = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedEvent
+        fields = ['uuid', 'name', 'location', 'start_datetime', 'end_datetime',
+                  'organizer_email', 'organizer_name', 'description', 'link',
+                  'participants_limit', 'participant_count', 'comment_count',
+                  'participants', 'comments', 'archived_at']
+        read_only_fields = fields
+
+    def get_participant_count(self, obj) -> int:
+        return len(obj.participants)
+
+    def get_comment_count(self, obj) -> int:
+        return len(obj.comments)
+
+    def get_participants(self, obj) -> list[dict]:
+        return archive.as_dicts('participants', obj.participants)
+
+    def get_comments(self, obj) -> list[dict]:
+        """Comments oldest first, without their authors' emails, as in live events."""
+        return [{field: value for field, value in comment.items()
+                 if field != 'author_email'}
+                for comment in archive.as_dicts('comments', obj.comments)]
@@ -0,0 +1,79 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import event_cache
+from .models import Comment, Event, Participant
+
+
+def touch_event(event_id, **counters):
+    """
+    Mark an event as changed, invalidating anything derived from its version,
+    and shift its denormalized counters by the given deltas.
+    """
+    changes = {name: F(name) + delta for name, delta in counters.items()}
+    Event.objects.filter(pk=event_id).update(updated_at=timezone.now(), **changes)
+
+
+def participants_bulk_created(event_id, event_uuid, count) -> None:
+    """
+    Do the bookkeeping of participant_saved for ``count`` participants added
+    with bulk_create, which skips the signals.
+    """
+    if count:
+        touch_event(event_id, participant_count=count)
+        event_cache.invalidate(event_uuid)
+
+
+def event_uuid(instance):
+    """Return the uuid of a child row's event, without a query if it is loaded."""
+    if type(instance).event.is_cached(instance):
+        return instance.event.uuid
+    return (Event.objects.filter(pk=instance.event_id)
+            .values_list('uuid', flat=True).first())
+
+
+def deleting_event(origin) -> bool:
+    """Whether a delete cascades from an event, which makes child bookkeeping moot."""
+    return isinstance(origin, Event) or getattr(origin, 'model', None) is Event
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed(sender, instance, **kwargs):  # noqa: ARG001
+    event_cache.invalidate(instance.uuid)
+
+
+@receiver(post_save, sender=Participant)
+def participant_saved(sender, instance, created, **kwargs):  # noqa: ARG001
+    if not created:
+        touch_event(instance.event_id)
+    elif not getattr(instance, 'seat_reserved', False):
+        touch_event(instance.event_id, participant_count=1)
+    event_cache.invalidate(event_uuid(instance))
+
+
+@receiver(post_delete, sender=Participant)
+def participant_deleted(sender, instance, origin=None, **kwargs):  # noqa: ARG001
+    if deleting_event(origin):
+        return
+    touch_event(instance.event_id, participant_count=-1)
+    event_cache.invalidate(event_uuid(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):  # noqa: ARG001
+    if created:
+        touch_event(instance.event_id, comment_count=1)
+    else:
+        touch_event(instance.event_id)
+    event_cache.invalidate(event_uuid(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):  # noqa: ARG001
+    if deleting_event(origin):
+        return
+    touch_event(instance.event_id, comment_count=-1)
+    event_cache.invalidate(event_uuid(instance))
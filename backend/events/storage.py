@@ -0,0 +1,71 @@
+"""
+File storage that names every file after the SHA-256 of its content.
+
+A name therefore always refers to the same bytes, which lets the web server
+serve media as immutable, and saving content that is already stored returns
+the existing file instead of writing a copy. Files are never overwritten or
+deleted in place; unreferenced ones are removed by the ``gc_media`` command.
+"""
+import hashlib
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils.functional import cached_property
+
+
+def content_digest(content) -> str:
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def content_name(self, name, content) -> str:
+        """
+        Return ``<directory>/<aa>/<sha256><ext>`` for content suggested to be
+        saved as ``name``, sharded by the first two digits of the hash.
+        """
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        digest = content_digest(content)
+        return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Refresh the age gc_media checks, so a duplicate being saved
+            # right now is not collected before its row is committed
+            os.utime(self.path(name))
+            return name
+        # A concurrent save of the same content makes the base class fall
+        # back to a suffixed name, which is still never reused
+        return super().save(name, content, max_length)
+
+
+class PrivateStorage(FileSystemStorage):
+    """Local storage under PRIVATE_MEDIA_ROOT, which the web server never serves."""
+
+    def _clear_cached_properties(self, setting, **kwargs) -> None:
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == 'PRIVATE_MEDIA_ROOT':
+            self.__dict__.pop('base_location', None)
+            self.__dict__.pop('location', None)
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.PRIVATE_MEDIA_ROOT)
+
+
+def private_storage():
+    """Storage for files that must not be served, such as participant imports."""
+    return storages['private']
@@ -1,12 +1,32 @@
+import csv
 import logging
+from collections.abc import Iterator
 
 import dramatiq
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image
+
+from . import archive, event_cache, images, imports, purge, waitlist
+from .mail_pool import SendError, connection_pool
+from .models import Event, Participant, ParticipantImport
+from .rendering import email_template
 
 logger = logging.getLogger(__name__)
 
+# Recipients per bulk email message
+FAN_OUT_BATCH_SIZE = 100
+# Times a fan-out is resumed after a failure, and the delay in milliseconds
+# before each resumption
+FAN_OUT_MAX_RETRIES = 3
+FAN_OUT_RETRY_DELAY = 15 * 1000
+# Invitation emails released to the workers at once, and the delay in
+# milliseconds between such batches, to stay under SMTP sending limits
+INVITE_BATCH_SIZE = 50
+INVITE_BATCH_INTERVAL = 60 * 1000
+
 
 def _get_url(kwargs=None) -> str:
     uuid = kwargs.pop('uuid', None)
@@ -17,6 +37,10 @@ def _get_url(kwargs=None) -> str:
         return f'http://localhost/event/{uuid}'
     return "http://localhost/"
 
+
+def _get_invitation_url(uuid) -> str:
+    return f'http://localhost/personalized-invitation/accept/{uuid}'
+
 @dramatiq.actor(max_retries=3)
 def send_event_invite_email_task(to_email, name, surname, event_details):
     """
@@ -36,12 +60,11 @@ def send_event_invite_email_task(to_email, name, surname, event_details):
     }
 
     try:
-        text_content = render_to_string('invite_email.txt', context)
-        html_content = render_to_string('invite_email.html', context)
+        text_content, html_content = email_template('invite_email').render(context)
 
         msg = EmailMultiAlternatives(subject, text_content, from_email, recipient_list)
         msg.attach_alternative(html_content, "text/html")
-        msg.send(fail_silently=False)
+        connection_pool.send_messages([msg])
         logger.info("Successfully sent invite via background task to %s", to_email)
 
     except Exception:
@@ -78,12 +101,11 @@ def send_event_admin_link_task(creator_email, creator_name, event_name,
     }
 
     try:
-        text_content = render_to_string('event_admin_link.txt', context)
-        html_content = render_to_string('event_admin_link.html', context)
+        text_content, html_content = email_template('event_admin_link').render(context)
 
         msg = EmailMultiAlternatives(subject, text_content, from_email, recipient_list)
         msg.attach_alternative(html_content, "text/html")
-        msg.send(fail_silently=False)
+        connection_pool.send_messages([msg])
         logger.info("Successfully sent admin link email for '%s' to %s",
                     event_name, creator_email)
 
@@ -93,16 +115,21 @@ def send_event_admin_link_task(creator_email, creator_name, event_name,
         raise
 
 
-@dramatiq.actor(max_retries=3)
-def send_event_update_notification_task(participant_email, participant_name,
-                                        event_name, event_uuid):
-    """
-    Dramatiq task to send an email notification
-    about event changes to participants.
-    """
+def _notification_messages(template, subject, recipients, context) -> list:
+    """Build one message per (email, name) recipient from a single broadcast render."""
+    broadcast = email_template(template).broadcast(context)
+    messages = []
+    for email, name in recipients:
+        text_content, html_content = broadcast.render(name)
+        msg = EmailMultiAlternatives(subject, text_content,
+                                     settings.DEFAULT_FROM_EMAIL, [email])
+        msg.attach_alternative(html_content, "text/html")
+        messages.append(msg)
+    return messages
+
+
+def _event_update_messages(recipients, event_name, event_uuid) -> list:
     subject = f"Update: Event Details Changed for '{event_name}'"
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [participant_email]
 
     try:
         event_link = _get_url(kwargs={'uuid': str(event_uuid)})
@@ -111,19 +138,42 @@ def send_event_update_notification_task(participant_email, participant_name,
         event_link = f"Please check the event page for event UUID: {event_uuid}"
 
     context = {
-        'participant_name': participant_name,
         'event_name': event_name,
         'event_link': event_link, # Link to the public event page
         'event_uuid': str(event_uuid),
     }
+    return _notification_messages('event_update_notification', subject,
+                                  recipients, context)
 
-    try:
-        text_content = render_to_string('event_update_notification.txt', context)
-        html_content = render_to_string('event_update_notification.html', context)
 
-        msg = EmailMultiAlternatives(subject, text_content, from_email, recipient_list)
-        msg.attach_alternative(html_content, "text/html")
-        msg.send(fail_silently=False)
+def _waitlist_promotion_messages(recipients, event_name, event_uuid) -> list:
+    subject = f"You're in: a seat freed up for '{event_name}'"
+    context = {
+        'event_name': event_name,
+        'event_link': _get_url(kwargs={'uuid': str(event_uuid)}),
+        'event_uuid': str(event_uuid),
+    }
+    return _notification_messages('waitlist_promotion', subject, recipients, context)
+
+
+def _event_cancellation_messages(recipients, event_name) -> list:
+    subject = f"Cancelled: Event '{event_name}' Has Been Cancelled"
+    context = {
+        'event_name': event_name,
+    }
+    return _notification_messages('event_cancellation', subject, recipients, context)
+
+
+@dramatiq.actor(max_retries=3)
+def send_event_update_notification_task(participant_email, participant_name,
+                                        event_name, event_uuid):
+    """
+    Dramatiq task to send an email notification
+    about event changes to participants.
+    """
+    try:
+        connection_pool.send_messages(_event_update_messages(
+            [(participant_email, participant_name)], event_name, event_uuid))
         logger.info("Successfully sent update notification for '%s' to %s",
                     event_name, participant_email)
 
@@ -139,22 +189,9 @@ def send_event_update_notification_task(participant_email, participant_name,
 def send_event_cancellation_notification_task(participant_email, participant_name,
                                               event_name):
     """Notifies a participant about event cancellation."""
-    subject = f"Cancelled: Event '{event_name}' Has Been Cancelled"
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [participant_email]
-
-    context = {
-        'participant_name': participant_name,
-        'event_name': event_name,
-    }
-
     try:
-        text_content = render_to_string('event_cancellation.txt', context)
-        html_content = render_to_string('event_cancellation.html', context)
-
-        msg = EmailMultiAlternatives(subject, text_content, from_email, recipient_list)
-        msg.attach_alternative(html_content, "text/html")
-        msg.send(fail_silently=False)
+        connection_pool.send_messages(_event_cancellation_messages(
+            [(participant_email, participant_name)], event_name))
         logger.info("Successfully sent cancellation notification for '%s' to %s",
                      event_name, participant_email)
 
@@ -164,3 +201,287 @@ def send_event_cancellation_notification_task(participant_email, participant_nam
             participant_email, event_name,
         )
         raise
+
+
+@dramatiq.actor(max_retries=3)
+def send_waitlist_promotion_notification_task(participant_email, participant_name,
+                                              event_name, event_uuid):
+    """Tells a waitlisted person they were given a seat."""
+    try:
+        connection_pool.send_messages(_waitlist_promotion_messages(
+            [(participant_email, participant_name)], event_name, event_uuid))
+        logger.info("Successfully sent waitlist promotion for '%s' to %s",
+                    event_name, participant_email)
+
+    except Exception:
+        logger.exception(
+            "Error sending waitlist promotion email to %s for event '%s'",
+            participant_email, event_name,
+        )
+        raise
+
+
+def _send_bulk(build_messages, single_actor, recipients, **common) -> None:
+    """
+    Send one message per (email, name) recipient over a single connection.
+    Recipients left unsent after a failure are handed over to the single
+    message actor, so they are retried without resending the rest.
+    """
+    messages = build_messages(recipients, **common)
+    try:
+        sent = connection_pool.send_messages(messages)
+    except SendError as e:
+        logger.exception("Bulk send failed after %s of %s messages",
+                         e.sent, len(messages))
+        _send_each(single_actor, (
+            {'participant_email': email, 'participant_name': name, **common}
+            for email, name in recipients[e.sent:]
+        ))
+        sent = e.sent
+    logger.info("Sent %s of %s messages over one connection", sent, len(messages))
+
+
+@dramatiq.actor(max_retries=3)
+def send_event_update_notifications_task(recipients, event_name, event_uuid):
+    """Send update notifications to a batch of (email, name) recipients."""
+    _send_bulk(_event_update_messages, send_event_update_notification_task,
+               recipients, event_name=event_name, event_uuid=event_uuid)
+
+
+@dramatiq.actor(max_retries=3)
+def send_event_cancellation_notifications_task(recipients, event_name):
+    """Send cancellation notifications to a batch of (email, name) recipients."""
+    _send_bulk(_event_cancellation_messages,
+               send_event_cancellation_notification_task,
+               recipients, event_name=event_name)
+
+
+@dramatiq.actor(max_retries=3)
+def send_waitlist_promotion_notifications_task(recipients, event_name, event_uuid):
+    """Send promotion notifications to a batch of (email, name) recipients."""
+    _send_bulk(_waitlist_promotion_messages, send_waitlist_promotion_notification_task,
+               recipients, event_name=event_name, event_uuid=event_uuid)
+
+
+def _send_each(actor, messages, batch_size=None, interval=0) -> int:
+    """
+    Enqueue one message per kwargs dict. A failed publish is logged
+    and does not stop the remaining messages from being sent. With a
+    batch_size, each following batch of messages is delayed by another
+    interval milliseconds.
+    """
+    failed = 0
+    for index, kwargs in enumerate(messages):
+        delay = index // batch_size * interval if batch_size else 0
+        try:
+            if delay:
+                actor.send_with_options(kwargs=kwargs, delay=delay)
+            else:
+                actor.send(**kwargs)
+        except Exception:
+            failed += 1
+            logger.exception("Failed to enqueue %s", actor.actor_name)
+    return failed
+
+
+def _participant_batches(event_id, after_id=0) -> Iterator[tuple[int, list]]:
+    """
+    Yield the (email, name) lists of an event's participants after the
+    ``after_id`` one, paged by id, each with the id of its last participant.
+    """
+    last_id = after_id
+    while True:
+        batch = list(Participant.objects
+                     .filter(event_id=event_id, id__gt=last_id)
+                     .order_by('id')
+                     .values_list('id', 'email', 'name')[:FAN_OUT_BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1][0]
+        yield last_id, [(email, name) for _, email, name in batch]
+
+
+@dramatiq.actor(max_retries=0)
+def fan_out_event_update_task(event_id, after_id=0, attempt=0):
+    """
+    Enqueues update notifications for the participants of an event after the
+    ``after_id`` one in batches. A failure enqueues the task again from the
+    first participant not notified yet, instead of retrying it from the start.
+    """
+    last_id = after_id
+    try:
+        event = Event.objects.filter(id=event_id).values('name', 'uuid').first()
+        if event is None:
+            logger.warning("Event %s no longer exists, skipping update fan-out",
+                           event_id)
+            return
+        for batch_last_id, batch in _participant_batches(event_id, after_id):
+            # Sent directly, so a failed publish resumes from its batch
+            send_event_update_notifications_task.send(
+                recipients=batch, event_name=event['name'],
+                event_uuid=str(event['uuid']))
+            last_id = batch_last_id
+    except Exception:
+        if attempt >= FAN_OUT_MAX_RETRIES:
+            raise
+        logger.exception("Update fan-out of event %s failed after participant %s",
+                         event_id, last_id)
+        fan_out_event_update_task.send_with_options(
+            kwargs={'event_id': event_id, 'after_id': last_id, 'attempt': attempt + 1},
+            delay=FAN_OUT_RETRY_DELAY)
+
+
+@dramatiq.actor(max_retries=3)
+def fan_out_invitation_emails_task(event_id, guests):
+    """
+    Enqueues invitation emails to (email, name, invitation uuid) guests,
+    spread out over time in batches of INVITE_BATCH_SIZE.
+    """
+    event = Event.objects.filter(id=event_id).values('name', 'start_datetime').first()
+    if event is None:
+        logger.warning("Event %s no longer exists, skipping invitations", event_id)
+        return
+    date = event['start_datetime'].strftime('%Y-%m-%d %H:%M')
+    _send_each(send_event_invite_email_task, (
+        {
+            'to_email': email,
+            'name': name,
+            'surname': '',
+            'event_details': {
+                'name': event['name'],
+                'date': date,
+                'event_link': _get_invitation_url(uuid),
+            },
+        }
+        for email, name, uuid in guests
+    ), batch_size=INVITE_BATCH_SIZE, interval=INVITE_BATCH_INTERVAL)
+
+
+@dramatiq.actor(max_retries=3)
+def promote_waitlist_task(event_id):
+    """
+    Fill the free seats of an event from its waitlist, one batch per transaction,
+    and notify the promoted people in batches once their seats are committed.
+    """
+    event = Event.objects.filter(id=event_id).values('name', 'uuid').first()
+    if event is None:
+        logger.warning("Event %s no longer exists, skipping waitlist promotion",
+                       event_id)
+        return
+    more = True
+    while more:
+        promoted, more = waitlist.promote(event_id)
+        logger.info("Promoted %s waitlisted people for event %s",
+                    len(promoted), event_id)
+        _send_each(send_waitlist_promotion_notifications_task, (
+            {
+                'recipients': promoted[start:start + FAN_OUT_BATCH_SIZE],
+                'event_name': event['name'],
+                'event_uuid': str(event['uuid']),
+            }
+            for start in range(0, len(promoted), FAN_OUT_BATCH_SIZE)
+        ))
+
+
+@dramatiq.actor(max_retries=3, time_limit=60 * 60 * 1000)
+def purge_event_task(event_id):
+    """
+    Remove a deleted event chunk by chunk, enqueueing the cancellation
+    notifications of each chunk of participants before it is deleted.
+    A retry resumes where the previous attempt stopped.
+    """
+    event = (Event.all_objects.filter(id=event_id, deleted_at__isnull=False)
+             .values('name').first())
+    if event is None:
+        logger.warning("Event %s is not deleted or already purged", event_id)
+        return
+
+    def notify(recipients) -> None:
+        _send_each(send_event_cancellation_notifications_task, (
+            {
+                'recipients': recipients[start:start + FAN_OUT_BATCH_SIZE],
+                'event_name': event['name'],
+            }
+            for start in range(0, len(recipients), FAN_OUT_BATCH_SIZE)
+        ))
+
+    deleted = purge.purge(event_id, notify)
+    logger.info("Purged event %s: %s", event_id, deleted)
+
+
+@dramatiq.actor(max_retries=0, time_limit=60 * 60 * 1000)
+def archive_expired_events_task():
+    """Archive the events past the retention period, enqueued daily by the scheduler."""
+    archived = archive.archive(archive.cutoff(), settings.EVENT_ARCHIVE_BATCH_SIZE)
+    logger.info("Archived %s expired events", archived)
+
+
+def _delete_files(storage, paths) -> None:
+    """Delete the given media files that no event references any more."""
+    for path in set(paths) - images.referenced(paths):
+        try:
+            storage.delete(path)
+        except OSError:  # noqa: PERF203
+            logger.exception("Could not delete %s", path)
+
+
+@dramatiq.actor(max_retries=3, time_limit=5 * 60 * 1000)
+def process_event_image_task(event_id, image_name):
+    """
+    Replace a freshly uploaded event image with its renditions: bounded,
+    metadata free copies in every supported format. Does nothing if the
+    image was replaced again before the job ran.
+    """
+    event = Event.objects.filter(id=event_id).first()
+    if event is None or (event.image.name or '') != image_name:
+        logger.info("Image of event %s changed, skipping processing", event_id)
+        return
+    storage = event.image.storage
+    old_paths = images.rendition_paths(event.image_renditions)
+
+    if image_name:
+        try:
+            renditions = images.make_renditions(event, storage)
+        except (OSError, Image.DecompressionBombError):
+            logger.exception("Could not process image %s of event %s",
+                             image_name, event_id)
+            return
+        new_image = renditions['full'][images.FALLBACK_FORMAT]
+    else:
+        renditions = {}
+        new_image = image_name
+
+    if image_name:
+        unchanged = Q(image=image_name)
+    else:
+        unchanged = Q(image='') | Q(image__isnull=True)
+    updated = Event.objects.filter(unchanged, id=event_id).update(
+        image=new_image, image_renditions=renditions, updated_at=timezone.now())
+    if not updated:
+        _delete_files(storage, images.rendition_paths(renditions))
+        return
+    event_cache.invalidate(event.uuid)
+    # The original may still carry metadata, so only the renditions are kept,
+    # unless another event uploaded the same content
+    _delete_files(storage, [*old_paths, *([image_name] if image_name else [])])
+    logger.info("Processed image of event %s into %s renditions",
+                event_id, len(renditions))
+
+
+@dramatiq.actor(max_retries=0, time_limit=60 * 60 * 1000)
+def import_participants_task(import_id):
+    """Import the CSV of a participant import, then delete the file."""
+    participant_import = ParticipantImport.objects.filter(id=import_id).first()
+    if participant_import is None:
+        logger.warning("Participant import %s no longer exists", import_id)
+        return
+    try:
+        imports.run(participant_import)
+    except (UnicodeDecodeError, csv.Error):
+        imports.fail(participant_import, "The file is not a UTF-8 encoded CSV.")
+    except Exception:
+        logger.exception("Participant import %s failed", import_id)
+        imports.fail(participant_import, "The import failed unexpectedly.")
+    finally:
+        participant_import.file.delete(save=False)
+    logger.info("Finished participant import %s", import_id)
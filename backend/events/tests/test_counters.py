@@ -0,0 +1,95 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from events.factories import (
+    CommentFactory,
+    EventFactory,
+    InvitationFactory,
+    ParticipantFactory,
+)
+from events.models import Event
+
+
+class EventCounterTest(APITestCase):
+    def setUp(self):
+        self.event = EventFactory(participants_limit=None)
+        self.participant = ParticipantFactory(event=self.event)
+
+    def assertCounts(self, participants, comments):  # noqa: N802
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, participants)
+        self.assertEqual(self.event.comment_count, comments)
+
+    def test_counters_follow_invitation_accept_and_leave(self):
+        invitation = InvitationFactory(event=self.event)
+        response = self.client.post(reverse('events:invitation-accept'), {
+            'invitation': invitation.uuid,
+            'name': 'Guest',
+            'email': 'guest@example.com',
+        })
+        self.assertCounts(2, 0)
+
+        self.client.delete(reverse('events:event-leave',
+                                   args=[response.data['uuid']]))
+        self.assertCounts(1, 0)
+
+    def test_remove_participant_cascades_to_comments(self):
+        CommentFactory.create_batch(2, event=self.event, author=self.participant,
+                                     parent=None)
+        CommentFactory(event=self.event, author=ParticipantFactory(event=self.event),
+                       parent=None)
+        self.assertCounts(2, 3)
+
+        self.client.delete(reverse('events:event-admin-remove-participant',
+                                   args=[self.participant.id, self.event.edit_uuid]))
+        self.assertCounts(1, 1)
+
+    def test_event_save_does_not_overwrite_counters(self):
+        stale = Event.objects.get(pk=self.event.pk)
+        ParticipantFactory(event=self.event)
+
+        stale.name = 'Renamed'
+        stale.save()
+        self.assertCounts(2, 0)
+        self.assertEqual(self.event.name, 'Renamed')
+
+    def test_participants_limit_uses_counter(self):
+        url = reverse('events:event-admin-detail',
+                      args=[self.event.uuid, self.event.edit_uuid])
+        ParticipantFactory(event=self.event)
+
+        with self.assertNumQueries(2):
+            response = self.client.patch(url, {'participants_limit': 1})
+        self.assertEqual(response.status_code, 400)
+
+
+class RecountEventCountersCommandTest(TestCase):
+    def test_repairs_drifted_counters(self):
+        events = EventFactory.create_batch(3)
+        for event in events:
+            CommentFactory(event=event, author=ParticipantFactory(event=event),
+                           parent=None)
+        Event.objects.update(participant_count=7, comment_count=0)
+
+        out = StringIO()
+        call_command('recount_event_counters', '--batch-size', '2', stdout=out)
+
+        self.assertIn("Recounted 3 events", out.getvalue())
+        self.assertEqual(
+            set(Event.objects.values_list('participant_count', 'comment_count')),
+            {(1, 1)})
+
+    def test_only_given_events(self):
+        event, other = EventFactory.create_batch(2)
+        Event.objects.update(participant_count=5)
+
+        call_command('recount_event_counters', str(event.uuid), stdout=StringIO())
+
+        event.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(event.participant_count, 0)
+        self.assertEqual(other.participant_count, 5)
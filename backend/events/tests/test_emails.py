@@ -1,8 +1,10 @@
 from django.core import mail
+from django.template import engines
 from django.template.loader import render_to_string
 from django.test import TestCase
 
 from events.emails import send_event_invite_email_sync
+from events.rendering import EmailTemplate, email_template
 
 
 class UserProfileTaskTest(TestCase):
@@ -58,3 +60,39 @@ class EmailSendingTest(TestCase):
         self.assertEqual(sent_email.alternatives[0][0].strip(),
                          expected_html_content.strip())
         self.assertEqual(sent_email.alternatives[0][1], "text/html")
+
+
+class EmailTemplateTest(TestCase):
+    def setUp(self):
+        self.context = {
+            'event_name': 'Garden <party> & barbecue',
+            'event_link': 'http://localhost/event/1',
+            'event_uuid': '1',
+        }
+
+    def render_to_strings(self, name, context):
+        return (render_to_string(f'{name}.txt', context),
+                render_to_string(f'{name}.html', context))
+
+    def test_render_matches_render_to_string(self):
+        context = {**self.context, 'participant_name': 'Jane'}
+        self.assertEqual(email_template('event_update_notification').render(context),
+                         self.render_to_strings('event_update_notification', context))
+
+    def test_broadcast_matches_full_render_for_every_recipient(self):
+        broadcast = email_template('event_update_notification').broadcast(self.context)
+        for name in ['Jane', 'O\'Brien & <Sons>', '']:
+            context = {**self.context, 'participant_name': name}
+            self.assertEqual(broadcast.render(name),
+                             self.render_to_strings('event_update_notification',
+                                                    context))
+
+    def test_broadcast_falls_back_when_field_is_filtered(self):
+        template = EmailTemplate.__new__(EmailTemplate)
+        engine = engines['django']
+        template.text = engine.from_string('Hi {{ participant_name|upper }}')
+        template.html = engine.from_string('<b>{{ participant_name|upper }}</b>')
+        broadcast = template.broadcast({})
+
+        self.assertEqual(broadcast.render('jane'), ('Hi JANE', '<b>JANE</b>'))
+        self.assertEqual(broadcast.render('joe'), ('Hi JOE', '<b>JOE</b>'))
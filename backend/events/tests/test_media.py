@@ -0,0 +1,94 @@
+import datetime as dt
+import os
+import posixpath
+import time
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from events import images, tasks, uploads
+from events.factories import EventFactory
+from events.models import ImageUpload
+from events.tests.utils import TempMediaMixin, jpeg_upload
+
+
+class MediaTestCase(TempMediaMixin, TestCase):
+    def age(self, path, seconds=2 * 3600):
+        mtime = time.time() - seconds
+        os.utime(default_storage.path(path), (mtime, mtime))
+
+
+class ContentAddressedStorageTest(MediaTestCase):
+    def test_name_is_content_hash(self):
+        name = default_storage.save('event_images/Holiday.JPG', ContentFile(b'abc'))
+
+        digest = 'ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad'
+        self.assertEqual(name, f'event_images/ba/{digest}.jpg')
+
+    def test_duplicate_content_is_stored_once(self):
+        first = default_storage.save('event_images/a.png', ContentFile(b'same'))
+        second = default_storage.save('event_images/b.png', ContentFile(b'same'))
+        other = default_storage.save('event_images/c.png', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(default_storage.listdir(posixpath.dirname(first))[1]), 1)
+
+    def test_shared_original_survives_processing(self):
+        event = EventFactory(image=jpeg_upload())
+        other = EventFactory(image=jpeg_upload())
+        self.assertEqual(event.image.name, other.image.name)
+
+        tasks.process_event_image_task(event.id, event.image.name)
+
+        self.assertTrue(default_storage.exists(other.image.name))
+
+
+class GarbageCollectMediaTest(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = EventFactory(image=jpeg_upload())
+        tasks.process_event_image_task(self.event.id, self.event.image.name)
+        self.event.refresh_from_db()
+        self.kept = images.rendition_paths(self.event.image_renditions)
+        self.orphan = default_storage.save('event_images/x.jpg', ContentFile(b'x'))
+        self.fresh = default_storage.save('event_images/y.jpg', ContentFile(b'y'))
+        for path in [*self.kept, self.orphan]:
+            self.age(path)
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_media', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_old_unreferenced_files_only(self):
+        output = self.gc('--batch-size', '2')
+
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertTrue(default_storage.exists(self.fresh))
+        self.assertTrue(all(default_storage.exists(path) for path in self.kept))
+        self.assertIn(f"Deleted 1 of {len(self.kept) + 2} files.", output)
+
+    def test_dry_run_keeps_files(self):
+        output = self.gc('--dry-run')
+
+        self.assertTrue(default_storage.exists(self.orphan))
+        self.assertIn("Would delete 1 of", output)
+
+    def test_removes_expired_uploads(self):
+        expired, recent = ImageUpload.objects.bulk_create(
+            [ImageUpload(size=10), ImageUpload(size=10)])
+        for upload in (expired, recent):
+            uploads.start(upload)
+        ImageUpload.objects.filter(pk=expired.pk).update(
+            created_at=timezone.now() - dt.timedelta(days=2))
+
+        output = self.gc()
+
+        self.assertEqual(list(ImageUpload.objects.all()), [recent])
+        self.assertFalse(uploads.staging_path(expired).exists())
+        self.assertIn("Removed 1 expired uploads.", output)
@@ -0,0 +1,602 @@
+import datetime as dt
+import smtplib
+from collections.abc import Iterator
+from io import StringIO
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from events import images, imports, purge, tasks, waitlist
+from events.factories import (
+    CommentFactory,
+    EventFactory,
+    InvitationFactory,
+    ParticipantFactory,
+    PersonalizedInvitationFactory,
+)
+from events.mail_pool import EmailConnectionPool, SendError
+from events.models import (
+    ArchivedEvent,
+    Comment,
+    Event,
+    Participant,
+    ParticipantImport,
+    WaitlistEntry,
+)
+from events.tests.utils import TempMediaMixin, jpeg_upload
+
+
+class FanOutTaskTest(TestCase):
+    def setUp(self):
+        self.event = EventFactory()
+        self.participants = ParticipantFactory.create_batch(5, event=self.event)
+        self.recipients = [[p.email, p.name] for p in self.participants]
+
+    @mock.patch.object(tasks, 'FAN_OUT_BATCH_SIZE', 2)
+    def test_update_fan_out_enqueues_batches(self):
+        with mock.patch.object(tasks.send_event_update_notifications_task,
+                               'send') as send:
+            tasks.fan_out_event_update_task(self.event.id)
+
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(
+            [email for call in send.call_args_list
+             for email, _ in call.kwargs['recipients']],
+            [participant.email for participant in self.participants])
+        self.assertEqual(send.call_args.kwargs['event_uuid'], str(self.event.uuid))
+
+    @mock.patch.object(tasks, 'FAN_OUT_BATCH_SIZE', 2)
+    def test_failed_publish_resumes_update_fan_out_from_its_batch(self):
+        update = tasks.fan_out_event_update_task
+        with mock.patch.object(tasks.send_event_update_notifications_task, 'send',
+                               side_effect=[None, OSError]) as send, \
+                mock.patch.object(update, 'send_with_options') as resume:
+            update(self.event.id)
+
+        self.assertEqual(send.call_count, 2)
+        resume.assert_called_once_with(
+            kwargs={'event_id': self.event.id, 'after_id': self.participants[1].id,
+                    'attempt': 1},
+            delay=tasks.FAN_OUT_RETRY_DELAY)
+
+    @mock.patch.object(tasks, 'FAN_OUT_BATCH_SIZE', 2)
+    def test_failed_update_fan_out_resumes_after_enqueued_batches(self):
+        batches = tasks._participant_batches  # noqa: SLF001
+
+        def fail_after_first_batch(event_id, after_id) -> Iterator:
+            pages = batches(event_id, after_id)
+            yield next(pages)
+            msg = 'connection lost'
+            raise OSError(msg)
+
+        update = tasks.fan_out_event_update_task
+        with mock.patch.object(tasks.send_event_update_notifications_task,
+                               'send') as send, \
+                mock.patch.object(tasks, '_participant_batches',
+                                  side_effect=fail_after_first_batch), \
+                mock.patch.object(update, 'send_with_options') as resume:
+            update(self.event.id)
+
+        self.assertEqual(send.call_count, 1)
+        resume.assert_called_once_with(
+            kwargs={'event_id': self.event.id, 'after_id': self.participants[1].id,
+                    'attempt': 1},
+            delay=tasks.FAN_OUT_RETRY_DELAY)
+
+        with mock.patch.object(tasks.send_event_update_notifications_task,
+                               'send') as send:
+            update(**resume.call_args.kwargs['kwargs'])
+        self.assertEqual([email for call in send.call_args_list
+                          for email, _ in call.kwargs['recipients']],
+                         [participant.email for participant in self.participants[2:]])
+
+    def test_bulk_actor_sends_over_one_connection(self):
+        pool = EmailConnectionPool()
+        with mock.patch.object(tasks, 'connection_pool', pool), \
+                mock.patch('events.mail_pool.get_connection',
+                           wraps=get_connection) as connect:
+            tasks.send_event_update_notifications_task(
+                self.recipients[:3], 'Party', str(self.event.uuid))
+            tasks.send_event_cancellation_notifications_task(
+                self.recipients[3:], 'Party')
+
+        connect.assert_called_once()
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual([m.to[0] for m in mail.outbox],
+                         [email for email, _ in self.recipients])
+
+    def test_bulk_actor_hands_unsent_recipients_to_single_actor(self):
+        with mock.patch.object(tasks.connection_pool, 'send_messages',
+                               side_effect=SendError(2)), \
+                mock.patch.object(tasks.send_event_cancellation_notification_task,
+                                  'send') as send:
+            tasks.send_event_cancellation_notifications_task(self.recipients, 'Party')
+
+        self.assertEqual([call.kwargs['participant_email']
+                          for call in send.call_args_list],
+                         [email for email, _ in self.recipients[2:]])
+
+
+class InvitationFanOutTest(TestCase):
+    def setUp(self):
+        self.event = EventFactory()
+        self.guests = [(f'guest{i}@example.com', f'Guest {i}', str(uuid4()))
+                       for i in range(5)]
+
+    @mock.patch.object(tasks, 'INVITE_BATCH_SIZE', 2)
+    def test_invitations_are_spread_over_batches(self):
+        invite = tasks.send_event_invite_email_task
+        with mock.patch.object(invite, 'send') as send, \
+                mock.patch.object(invite, 'send_with_options') as delayed:
+            tasks.fan_out_invitation_emails_task(self.event.id, self.guests)
+
+        self.assertEqual([call.kwargs['to_email'] for call in send.call_args_list],
+                         ['guest0@example.com', 'guest1@example.com'])
+        self.assertEqual([call.kwargs['delay'] for call in delayed.call_args_list],
+                         [tasks.INVITE_BATCH_INTERVAL] * 2
+                         + [2 * tasks.INVITE_BATCH_INTERVAL])
+        link = delayed.call_args.kwargs['kwargs']['event_details']['event_link']
+        self.assertTrue(link.endswith(f'/personalized-invitation/accept/'
+                                      f'{self.guests[4][2]}'))
+
+    def test_invitation_email_renders_link(self):
+        email, name, uuid = self.guests[0]
+        with mock.patch.object(tasks.send_event_invite_email_task, 'send') as send:
+            tasks.fan_out_invitation_emails_task(self.event.id, self.guests[:1])
+        tasks.send_event_invite_email_task(**send.call_args.kwargs)
+
+        self.assertEqual(mail.outbox[-1].to, [email])
+        self.assertIn(name, mail.outbox[-1].body)
+        self.assertIn(uuid, mail.outbox[-1].body)
+
+
+class EmailConnectionPoolTest(TestCase):
+    def test_reconnects_when_server_disconnects(self):
+        backend = mock.Mock()
+        backend.send_messages.side_effect = [smtplib.SMTPServerDisconnected, 1, 1]
+        pool = EmailConnectionPool()
+        with mock.patch('events.mail_pool.get_connection',
+                        return_value=backend) as connect:
+            sent = pool.send_messages([EmailMessage(to=['a@example.com']),
+                                       EmailMessage(to=['b@example.com'])])
+
+        self.assertEqual(sent, 2)
+        self.assertEqual(connect.call_count, 2)
+        backend.close.assert_called_once()
+
+    def test_refused_recipients_are_not_resent(self):
+        backend = mock.Mock()
+        backend.send_messages.side_effect = smtplib.SMTPRecipientsRefused(
+            {'a@example.com': (550, b'No such user')})
+        pool = EmailConnectionPool()
+        with mock.patch('events.mail_pool.get_connection',
+                        return_value=backend) as connect, \
+                pytest.raises(SendError) as error:
+            pool.send_messages([EmailMessage(to=['a@example.com']),
+                                EmailMessage(to=['b@example.com'])])
+
+        self.assertEqual(error.value.sent, 0)
+        connect.assert_called_once()
+        backend.send_messages.assert_called_once()
+        backend.close.assert_not_called()
+
+    @override_settings(EMAIL_CONNECTION_IDLE_TIMEOUT=0)
+    def test_closes_idle_connections(self):
+        backend = mock.Mock()
+        backend.send_messages.return_value = 1
+        pool = EmailConnectionPool()
+        with mock.patch('events.mail_pool.get_connection', return_value=backend):
+            pool.send_messages([EmailMessage(to=['a@example.com'])])
+            pool.close_idle()
+
+        backend.close.assert_called_once()
+
+
+class EventMutationFanOutTest(APITestCase):
+    def setUp(self):
+        self.event = EventFactory()
+        ParticipantFactory.create_batch(3, event=self.event)
+        self.url = reverse('events:event-admin-detail',
+                           args=[self.event.uuid, self.event.edit_uuid])
+
+    def test_update_enqueues_single_fan_out_message(self):
+        with mock.patch('events.views.fan_out_event_update_task') as task:
+            self.client.patch(self.url, {'name': 'Renamed'}, format='json')
+        task.send.assert_called_once_with(event_id=self.event.id)
+
+    def test_destroy_enqueues_purge(self):
+        with mock.patch('events.views.purge_event_task') as task:
+            self.client.delete(self.url)
+        task.send.assert_called_once_with(event_id=self.event.id)
+
+
+class PurgeEventTest(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = EventFactory()
+        self.participants = ParticipantFactory.create_batch(5, event=self.event)
+        thread = [CommentFactory(event=self.event, author=self.participants[0],
+                                 parent=None)]
+        for participant in self.participants[1:]:
+            thread.append(CommentFactory(event=self.event, author=participant,
+                                         parent=thread[-1]))
+        newer = CommentFactory(event=self.event, author=self.participants[0],
+                               parent=None)
+        # A reply moved under a comment created after it
+        Comment.objects.filter(pk=thread[1].pk).update(parent=newer)
+        WaitlistEntry.objects.create(event=self.event, name="Guest",
+                                     email="guest@example.com")
+        InvitationFactory(event=self.event)
+        PersonalizedInvitationFactory(event=self.event)
+        self.participant_import = ParticipantImport.objects.create(
+            event=self.event, file=ContentFile(b'Ann,ann@example.com', name='a.csv'))
+        self.other = EventFactory()
+        CommentFactory(event=self.other, author=ParticipantFactory(event=self.other),
+                       parent=None)
+        Event.objects.filter(pk=self.event.pk).update(deleted_at=timezone.now())
+
+    def run_purge(self, send_effect=None):
+        raw_delete = purge.raw_delete
+
+        def checked_delete(queryset) -> int:
+            # Deferred foreign keys are only checked on commit otherwise
+            deleted = raw_delete(queryset)
+            connection.check_constraints()
+            return deleted
+
+        with mock.patch.object(tasks.send_event_cancellation_notifications_task,
+                               'send', side_effect=send_effect) as send, \
+                mock.patch.object(purge, 'raw_delete', side_effect=checked_delete):
+            tasks.purge_event_task(self.event.id)
+        return [email for call in send.call_args_list
+                for email, _ in call.kwargs['recipients']]
+
+    @mock.patch.object(purge, 'CHUNK_SIZE', 2)
+    @mock.patch.object(tasks, 'FAN_OUT_BATCH_SIZE', 1)
+    def test_removes_event_and_children_in_chunks(self):
+        storage = self.participant_import.file.storage
+        notified = self.run_purge()
+
+        self.assertEqual(notified, [p.email for p in self.participants])
+        self.assertFalse(Event.all_objects.filter(pk=self.event.pk).exists())
+        for relation in Event._meta.related_objects:  # noqa: SLF001
+            with self.subTest(model=relation.related_model.__name__):
+                self.assertFalse(relation.related_model.objects
+                                 .filter(event_id=self.event.id).exists())
+        self.assertFalse(storage.exists(self.participant_import.file.name))
+        self.assertEqual(Comment.objects.filter(event=self.other).count(), 1)
+
+    @mock.patch.object(tasks, 'FAN_OUT_BATCH_SIZE', 1)
+    def test_failed_publish_does_not_stop_notifications(self):
+        notified = self.run_purge(send_effect=[OSError, *[None] * 4])
+
+        self.assertEqual(notified, [p.email for p in self.participants])
+        self.assertFalse(Event.all_objects.filter(pk=self.event.pk).exists())
+
+    def test_skips_events_that_are_not_deleted(self):
+        Event.all_objects.filter(pk=self.event.pk).update(deleted_at=None)
+
+        self.assertEqual(self.run_purge(), [])
+        self.assertEqual(self.event.participants.count(), 5)
+
+    def test_every_child_model_is_purged(self):
+        self.assertEqual({relation.related_model
+                          for relation in Event._meta.related_objects},  # noqa: SLF001
+                         {Comment, Participant, *purge.OTHER_CHILDREN})
+
+    def test_command_purges_deleted_events(self):
+        with mock.patch.object(tasks.send_event_cancellation_notifications_task,
+                               'send'):
+            call_command('purge_deleted_events', stdout=StringIO())
+
+        self.assertFalse(Event.all_objects.filter(pk=self.event.pk).exists())
+        self.assertTrue(Event.objects.filter(pk=self.other.pk).exists())
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        long_ago = timezone.now() - dt.timedelta(days=400)
+        self.expired = [EventFactory(start_datetime=long_ago, participants_limit=None)
+                        for _ in range(3)]
+        self.participants = ParticipantFactory.create_batch(2, event=self.expired[0])
+        self.comment = CommentFactory(event=self.expired[0], parent=None,
+                                      author=self.participants[0])
+        self.reply = CommentFactory(event=self.expired[0], parent=self.comment,
+                                    author=self.participants[1])
+        InvitationFactory(event=self.expired[0])
+        self.recent = EventFactory(start_datetime=timezone.now() - dt.timedelta(days=7))
+
+    def archive(self, *args):
+        call_command('archive_events', *args, stdout=StringIO())
+
+    def test_moves_expired_events_to_the_archive(self):
+        self.archive('--batch-size', '2')
+
+        self.assertEqual(list(Event.all_objects.all()), [self.recent])
+        self.assertFalse(Participant.objects.exclude(event=self.recent).exists())
+        self.assertFalse(Comment.objects.exists())
+        archived = ArchivedEvent.objects.get(uuid=self.expired[0].uuid)
+        self.assertEqual(archived.name, self.expired[0].name)
+        self.assertEqual(archived.end_datetime, self.expired[0].end_datetime)
+        self.assertEqual([row[2] for row in archived.participants],
+                         [participant.email for participant in self.participants])
+        self.assertEqual([row[1] for row in archived.comments],
+                         [None, str(self.comment.uuid)])
+        self.assertEqual(ArchivedEvent.objects.count(), 3)
+
+    def test_retention_period_and_dry_run(self):
+        self.archive('--days', '500')
+        self.archive('--dry-run')
+
+        self.assertFalse(ArchivedEvent.objects.exists())
+        self.assertEqual(Event.objects.count(), 4)
+
+    def test_failed_event_is_rolled_back(self):
+        # The newest expired event is archived last
+        failing = max(self.expired, key=lambda event: (event.end_datetime, event.id))
+        purge_event = purge.purge
+
+        def purge_or_fail(event_id) -> dict:
+            if event_id == failing.id:
+                msg = 'disk full'
+                raise OSError(msg)
+            return purge_event(event_id)
+
+        with mock.patch.object(purge, 'purge', side_effect=purge_or_fail), \
+                pytest.raises(OSError, match='disk full'):
+            self.archive()
+
+        self.assertEqual(set(ArchivedEvent.objects.values_list('uuid', flat=True)),
+                         {event.uuid for event in self.expired if event != failing})
+        self.assertEqual(set(Event.objects.all()), {failing, self.recent})
+
+    def test_periodic_actor(self):
+        with mock.patch.object(tasks.archive_expired_events_task, 'send') as send:
+            self.archive('--enqueue')
+        send.assert_called_once_with()
+
+        tasks.archive_expired_events_task()
+        self.assertEqual(ArchivedEvent.objects.count(), 3)
+
+
+class WaitlistPromotionTest(APITestCase):
+    def setUp(self):
+        self.event = EventFactory(participants_limit=2)
+        self.participants = ParticipantFactory.create_batch(2, event=self.event)
+        self.waiting = [
+            WaitlistEntry.objects.create(event=self.event, name=f"Guest {i}",
+                                         email=f"guest{i}@example.com")
+            for i in range(4)
+        ]
+
+    def promote(self):
+        with mock.patch.object(tasks.send_waitlist_promotion_notifications_task,
+                               'send') as send:
+            tasks.promote_waitlist_task(self.event.id)
+        return [email for call in send.call_args_list
+                for email, _ in call.kwargs['recipients']]
+
+    def test_freed_seats_go_to_oldest_entries(self):
+        self.participants[0].delete()
+
+        notified = self.promote()
+
+        self.assertEqual(notified, [self.waiting[0].email])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 2)
+        self.assertTrue(self.event.participants.filter(
+            uuid=self.waiting[0].uuid, email=self.waiting[0].email).exists())
+        self.assertEqual(self.event.waitlist.count(), 3)
+
+    @mock.patch.object(tasks, 'FAN_OUT_BATCH_SIZE', 2)
+    @mock.patch.object(waitlist, 'PROMOTION_BATCH_SIZE', 2)
+    def test_raised_limit_promotes_in_batches(self):
+        ParticipantFactory(event=self.event, email=self.waiting[1].email)
+        Event.objects.filter(pk=self.event.pk).update(participants_limit=None)
+
+        notified = self.promote()
+
+        self.assertEqual(notified, [entry.email for entry in self.waiting
+                                    if entry != self.waiting[1]])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 6)
+        self.assertEqual(self.event.participants.count(), 6)
+        self.assertFalse(self.event.waitlist.exists())
+
+    def test_full_event_promotes_nobody(self):
+        self.assertEqual(self.promote(), [])
+        self.assertEqual(self.event.waitlist.count(), 4)
+
+    def test_promotion_email(self):
+        tasks.send_waitlist_promotion_notifications_task(
+            [['guest@example.com', 'Guest']], self.event.name, str(self.event.uuid))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Hello Guest", mail.outbox[0].body)
+        self.assertIn(str(self.event.uuid), mail.outbox[0].body)
+
+    def test_leave_and_remove_enqueue_promotion(self):
+        with mock.patch('events.views.promote_waitlist_task') as task:
+            self.client.delete(reverse('events:event-leave',
+                                       args=[self.participants[0].uuid]))
+            self.client.delete(reverse(
+                'events:event-admin-remove-participant',
+                args=[self.participants[1].id, self.event.edit_uuid]))
+        self.assertEqual(task.send.call_count, 2)
+        task.send.assert_called_with(event_id=self.event.id)
+
+    def test_raising_limit_enqueues_promotion(self):
+        url = reverse('events:event-admin-detail',
+                      args=[self.event.uuid, self.event.edit_uuid])
+        with mock.patch('events.views.promote_waitlist_task') as task:
+            self.client.patch(url, {'name': 'Renamed'}, format='json')
+            task.send.assert_not_called()
+            self.client.patch(url, {'participants_limit': 10}, format='json')
+        task.send.assert_called_once_with(event_id=self.event.id)
+
+    def test_empty_waitlist_does_not_enqueue(self):
+        self.event.waitlist.all().delete()
+        with mock.patch('events.views.promote_waitlist_task') as task:
+            self.client.delete(reverse('events:event-leave',
+                                       args=[self.participants[0].uuid]))
+        task.send.assert_not_called()
+
+
+class ImageProcessingTest(TempMediaMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = EventFactory(image=jpeg_upload())
+        self.original = self.event.image.name
+
+    def process(self):
+        tasks.process_event_image_task(self.event.id, self.original)
+        self.event.refresh_from_db()
+
+    def test_renditions_are_bounded_and_stripped(self):
+        self.process()
+
+        renditions = self.event.image_renditions
+        self.assertEqual([(name, entry['width'], entry['height'])
+                          for name, entry in renditions.items()],
+                         [('thumbnail', 320, 160), ('card', 800, 400),
+                          ('full', 1920, 960)])
+        for path in images.rendition_paths(renditions):
+            with default_storage.open(path) as file, Image.open(file) as image:
+                self.assertNotIn('exif', image.info)
+                self.assertFalse(image.getexif())
+        self.assertEqual(self.event.image.name,
+                         renditions['full'][images.FALLBACK_FORMAT])
+        self.assertFalse(default_storage.exists(self.original))
+
+    def test_serializer_exposes_srcset(self):
+        self.process()
+
+        response = self.client.get(reverse('events:event-detail',
+                                           args=[self.event.uuid]))
+
+        srcset = response.data['image_srcset']
+        self.assertIn('webp', srcset)
+        self.assertRegex(srcset['jpeg'],
+                         r'^http://\S+/media/event_images/renditions/\S+ 320w, ')
+        self.assertTrue(srcset['jpeg'].endswith(' 1920w'))
+
+    def test_stale_job_leaves_newer_image_alone(self):
+        Event.objects.filter(id=self.event.id).update(image='event_images/new.jpg')
+
+        self.process()
+
+        self.assertEqual(self.event.image.name, 'event_images/new.jpg')
+        self.assertEqual(self.event.image_renditions, {})
+        self.assertTrue(default_storage.exists(self.original))
+
+    def test_replacing_image_removes_previous_renditions(self):
+        self.process()
+        previous = images.rendition_paths(self.event.image_renditions)
+        self.event.image = jpeg_upload(size=(100, 50), name='second.jpg')
+        self.event.save()
+        self.original = self.event.image.name
+
+        self.process()
+
+        self.assertEqual(self.event.image_renditions['full']['width'], 100)
+        self.assertFalse(any(default_storage.exists(path) for path in previous))
+
+    def test_update_enqueues_processing_only_for_new_image(self):
+        url = reverse('events:event-admin-detail',
+                      args=[self.event.uuid, self.event.edit_uuid])
+        with mock.patch('events.views.process_event_image_task') as task:
+            self.client.patch(url, {'name': 'Renamed'}, format='json')
+            task.send.assert_not_called()
+            self.client.patch(url, {'image': jpeg_upload(size=(10, 10))},
+                              format='multipart')
+        self.event.refresh_from_db()
+        task.send.assert_called_once_with(event_id=self.event.id,
+                                          image_name=self.event.image.name)
+
+
+class ParticipantImportTest(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = EventFactory(participants_limit=None)
+        ParticipantFactory(event=self.event, email='taken@example.com')
+
+    def run_import(self, content):
+        data = content.encode() if isinstance(content, str) else content
+        participant_import = ParticipantImport.objects.create(
+            event=self.event, file=ContentFile(data, name='guests.csv'),
+            size=len(data))
+        tasks.import_participants_task(participant_import.id)
+        participant_import.refresh_from_db()
+        return participant_import
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        result = self.run_import(
+            'Name,Email\n'
+            'Ann,ann@example.com\n'
+            'Bob,not-an-email\n'
+            '\n'
+            'Cid\n'
+            'Old,taken@example.com\n'
+            '"Doe, Dee",dee@example.com\n'
+            'Ann again,ann@example.com\n')
+
+        self.assertEqual(result.status, ParticipantImport.Status.DONE)
+        self.assertEqual(
+            (result.rows_processed, result.created_count, result.duplicate_count,
+             result.error_count), (6, 2, 2, 2))
+        self.assertEqual([error['row'] for error in result.errors], [3, 5])
+        self.assertEqual(
+            set(self.event.participants.exclude(email='taken@example.com')
+                .values_list('name', 'email')),
+            {('Ann', 'ann@example.com'), ('Doe, Dee', 'dee@example.com')})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 3)
+        self.assertFalse(result.file.storage.exists(result.file.name))
+
+    @mock.patch.object(imports, 'CHUNK_SIZE', 2)
+    def test_chunks_deduplicate_against_earlier_chunks(self):
+        rows = [f'Guest {i},guest{i % 3}@example.com' for i in range(7)]
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.run_import('\n'.join(rows))
+
+        self.assertEqual((result.created_count, result.duplicate_count), (3, 4))
+        # One lookup of existing participants per chunk of two rows
+        self.assertEqual(len([query for query in queries if query['sql'].startswith(
+            'SELECT "events_participant"."email"')]), 4)
+        self.assertEqual(Participant.objects.filter(event=self.event).count(), 4)
+
+    def test_rows_beyond_the_limit_are_reported(self):
+        Event.objects.filter(pk=self.event.pk).update(participants_limit=2)
+
+        result = self.run_import('Ann,ann@example.com\nBob,bob@example.com\n')
+
+        self.assertEqual((result.created_count, result.error_count), (1, 1))
+        self.assertEqual(result.errors, [{'row': 2, 'error': "The event is full."}])
+
+    @mock.patch.object(imports, 'MAX_ROWS', 2)
+    def test_stops_after_max_rows(self):
+        result = self.run_import('A,a@example.com\nB,b@example.com\nC,c@example.com')
+
+        self.assertEqual(result.created_count, 2)
+        self.assertEqual(result.errors[-1]['row'], 3)
+
+    def test_undecodable_file_fails(self):
+        result = self.run_import(b'Ann,ann@example.com\n\xff\xfe,broken\n')
+
+        self.assertEqual(result.status, ParticipantImport.Status.FAILED)
+        self.assertEqual(result.errors[-1],
+                         {'row': None, 'error': "The file is not a UTF-8 encoded CSV."})
@@ -1,10 +1,36 @@
+import csv
+import datetime as dt
+import io
+import json
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 from uuid import uuid4
 
+import ics
 import pytest
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 
+from events import archive, event_cache, exports, uploads, waitlist
 from events.factories import (
     CommentFactory,
     EventFactory,
@@ -15,10 +41,19 @@ from events.factories import (
 from events.models import (
     Comment,
     Event,
+    ImageUpload,
     Invitation,
     Participant,
+    ParticipantImport,
     PersonalizedInvitation,
+    WaitlistEntry,
 )
+from events.replicas import ReplicaMiddleware, ReplicaRouter, replica_reads
+from events.tests.utils import TempMediaMixin, jpeg_upload
+from events.utils import event_to_ics
+from events.uuids import uuid7
+
+UPLOAD_CHUNK_SIZE = 4096
 
 
 class EventCreateTests(APITestCase):
@@ -77,6 +112,134 @@ class EventCreateTests(APITestCase):
         self.assertNotEqual(str(event.edit_uuid), payload["edit_uuid"])
 
 
+@override_settings(IMAGE_UPLOAD_MAX_CHUNK_SIZE=UPLOAD_CHUNK_SIZE)
+class ImageUploadTests(TempMediaMixin, APITestCase):
+    chunk_size = UPLOAD_CHUNK_SIZE
+
+    def setUp(self):
+        super().setUp()
+        self.data = jpeg_upload().read()
+
+    def create(self, size=None):
+        response = self.client.post(reverse('events:image-upload-list'),
+                                    {'size': size or len(self.data)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['uuid']
+
+    def send(self, uuid, start, data=None, size=None):
+        data = self.data[start:start + self.chunk_size] if data is None else data
+        end = start + len(data) - 1
+        return self.client.patch(
+            reverse('events:image-upload-detail', args=[uuid]), data,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{size or len(self.data)}')
+
+    def upload(self):
+        uuid = self.create()
+        for start in range(0, len(self.data), self.chunk_size):
+            response = self.send(uuid, start)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return uuid, response
+
+    def test_chunks_complete_an_upload(self):
+        _, response = self.upload()
+
+        self.assertEqual(response.data['offset'], len(self.data))
+        self.assertTrue(response.data['complete'])
+        self.assertEqual((response.data['format'], response.data['width'],
+                          response.data['height']), ('JPEG', 2400, 1200))
+
+    def test_event_references_finished_upload(self):
+        uuid, _ = self.upload()
+        payload = {
+            'name': 'Party', 'location': 'Home', 'organizer_email': 'a@example.com',
+            'start_datetime': '2030-01-01T18:00:00Z',
+            'end_datetime': '2030-01-01T23:00:00Z', 'image_upload': uuid,
+        }
+        with mock.patch('events.views.process_event_image_task') as task:
+            response = self.client.post(reverse('events:event-admin-list'), payload,
+                                        format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        event = Event.objects.get()
+        with event.image.open('rb') as file:
+            self.assertEqual(file.read(), self.data)
+        task.send.assert_called_once()
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertFalse(any((self.root / 'uploads').iterdir()))
+
+    def test_unfinished_upload_cannot_be_referenced(self):
+        uuid = self.create()
+        self.send(uuid, 0)
+        event = EventFactory()
+        url = reverse('events:event-admin-detail', args=[event.uuid, event.edit_uuid])
+
+        response = self.client.patch(url, {'image_upload': uuid}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image_upload', response.data)
+
+    def test_resume_from_reported_offset(self):
+        uuid = self.create()
+        self.send(uuid, 0)
+
+        response = self.send(uuid, 2 * self.chunk_size)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.get(reverse('events:image-upload-detail', args=[uuid]))
+        self.assertEqual(response.data['offset'], self.chunk_size)
+
+        for start in range(response.data['offset'], len(self.data), self.chunk_size):
+            response = self.send(uuid, start)
+        self.assertTrue(response.data['complete'])
+
+    def test_non_image_is_rejected_once_header_should_be_there(self):
+        uuid = self.create(size=10 * self.chunk_size)
+        chunk = b'not an image' * 400
+
+        with mock.patch.object(uploads, 'HEADER_LIMIT', self.chunk_size):
+            response = self.send(uuid, 0, chunk[:self.chunk_size],
+                                 size=10 * self.chunk_size)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'].code, 'invalid_upload')
+        self.assertFalse(ImageUpload.objects.exists())
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=1000)
+    def test_oversized_image_is_rejected_on_first_chunk(self):
+        uuid = self.create()
+
+        response = self.send(uuid, 0)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ImageUpload.objects.exists())
+
+    def test_decompression_bomb_is_rejected(self):
+        def chunk(kind, data) -> bytes:
+            return (struct.pack('>I', len(data)) + kind + data
+                    + struct.pack('>I', zlib.crc32(kind + data)))
+
+        header = struct.pack('>IIBBBBB', 20000, 20000, 8, 2, 0, 0, 0)
+        self.data = (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+                     + chunk(b'IDAT', zlib.compress(b''))
+                     + chunk(b'IEND', b''))
+        uuid = self.create()
+
+        response = self.send(uuid, 0)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detail'].code, 'invalid_upload')
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertFalse(any((self.root / 'uploads').iterdir()))
+
+    def test_chunk_must_match_content_range(self):
+        uuid = self.create()
+
+        response = self.send(uuid, 0, size=len(self.data) + 1)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ImageUpload.objects.get().received, 0)
+
+
 class EventAdminDetailTests(APITestCase):
     def setUp(self):
         self.event = EventFactory()
@@ -138,6 +301,24 @@ class EventAdminDetailTests(APITestCase):
         with pytest.raises(Event.DoesNotExist):
             Event.objects.get(uuid=self.uuid)
 
+    def test_deleted_event_is_hidden_until_purged(self):
+        invitation = InvitationFactory(event=self.event)
+        url = reverse('events:event-admin-detail', args=[self.uuid, self.edit_uuid])
+        with mock.patch('events.views.purge_event_task') as task:
+            self.client.delete(url)
+
+        task.send.assert_called_once_with(event_id=self.event.id)
+        self.assertTrue(Event.all_objects.filter(uuid=self.uuid,
+                                                 deleted_at__isnull=False).exists())
+        for hidden in (url, reverse('events:event-detail', args=[self.uuid]),
+                       reverse('events:invitation-detail', args=[invitation.uuid])):
+            with self.subTest(url=hidden):
+                self.assertEqual(self.client.get(hidden).status_code,
+                                 status.HTTP_404_NOT_FOUND)
+        response = self.client.post(reverse('events:invitation-accept'), {
+            'invitation': invitation.uuid, 'name': 'Ann', 'email': 'ann@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class EventDetailsTests(APITestCase):
     def setUp(self):
@@ -160,6 +341,107 @@ class EventDetailsTests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+class ArchivedEventTests(APITestCase):
+    def setUp(self):
+        self.event = EventFactory()
+        participants = ParticipantFactory.create_batch(2, event=self.event)
+        comment = CommentFactory(event=self.event, author=participants[0], parent=None)
+        reply = CommentFactory(event=self.event, author=participants[1], parent=comment)
+        self.contents = [comment.content, reply.content]
+        archive.archive(self.event.end_datetime + dt.timedelta(seconds=1), 10)
+        self.url = reverse('events:archived-event-detail', args=[self.event.uuid])
+
+    def test_archived_event_is_read_only(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], self.event.name)
+        self.assertEqual(response.data['participant_count'], 2)
+        self.assertEqual([comment['content'] for comment in response.data['comments']],
+                         self.contents)
+        self.assertNotIn('author_email', response.data['comments'][0])
+        self.assertEqual(response.data['comments'][1]['parent'],
+                         response.data['comments'][0]['uuid'])
+        self.assertEqual(self.client.put(self.url, {}).status_code,
+                         status.HTTP_405_METHOD_NOT_ALLOWED)
+        live = reverse('events:event-detail', args=[self.event.uuid])
+        self.assertEqual(self.client.get(live).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class UuidTests(APITestCase):
+    def test_new_rows_get_time_ordered_uuids(self):
+        before = uuid7()
+        event = EventFactory()
+        participant = ParticipantFactory(event=event)
+
+        self.assertEqual([event.uuid.version, participant.uuid.version], [7, 7])
+        self.assertEqual(event.edit_uuid.version, 4)
+        self.assertLessEqual(before.bytes[:6], event.uuid.bytes[:6])
+        self.assertLessEqual(event.uuid.bytes[:6], participant.uuid.bytes[:6])
+        self.assertEqual(str(uuid7(0x0197_1234_5678))[:15], '01971234-5678-7')
+
+    def test_existing_v4_uuids_still_resolve(self):
+        event = EventFactory(uuid=uuid4())
+
+        response = self.client.get(reverse('events:event-detail', args=[event.uuid]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.middleware = ReplicaMiddleware(self.view)
+        self.read_from = None
+
+    def view(self, request):  # noqa: ARG002
+        self.read_from = self.router.db_for_read(Event)
+        return HttpResponse()
+
+    def request(self, method, **cookies):
+        request = getattr(RequestFactory(), method)('/api/event/')
+        request.COOKIES.update(cookies)
+        return self.middleware(request)
+
+    def test_safe_requests_read_from_a_replica(self):
+        for method in ('get', 'head', 'options'):
+            with self.subTest(method=method):
+                self.request(method)
+                self.assertIn(self.read_from, ['replica1', 'replica2'])
+        self.assertEqual(self.router.db_for_read(Event), 'default')
+
+    def test_mutations_use_the_primary_and_make_reads_sticky(self):
+        response = self.request('post')
+
+        self.assertEqual(self.read_from, 'default')
+        self.assertEqual(self.router.db_for_write(Event), 'default')
+        cookie = response.cookies[settings.REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_STICKY_SECONDS)
+
+        self.request('get', **{settings.REPLICA_STICKY_COOKIE: cookie.value})
+        self.assertEqual(self.read_from, 'default')
+
+    def test_reads_in_transactions_use_the_primary(self):
+        with replica_reads(), \
+                mock.patch.object(connection, 'in_atomic_block', new=True):
+            self.assertEqual(self.router.db_for_read(Event), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.request('get')
+        self.assertEqual(self.read_from, 'default')
+
+        response = self.request('post')
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+        self.assertFalse(self.router.allow_migrate('replica1', 'events'))
+
+
 class InvitationDetailTests(APITestCase):
     def setUp(self):
         self.event = EventFactory()
@@ -220,6 +502,7 @@ class InvitationAcceptTests(APITestCase):
         self.assertEqual(str(self.event.uuid), str(response.data['event']))
         self.assertEqual(payload['name'], response.data['name'])
         self.assertEqual(payload['email'], response.data['email'])
+        self.assertEqual(response.data['status'], 'joined')
         self.assertTrue(self.event.participants.filter(uuid=response.data['uuid']).exists())
 
     def test_invalid_invitation(self):
@@ -250,8 +533,74 @@ class InvitationAcceptTests(APITestCase):
         }
         response = self.client.post(self.url, data=payload, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("Participant with this email already exists in this event.",
-                      str(response.data))
+        self.assertEqual(response.data, {'non_field_errors': [
+            "Participant with this email already exists in this event."]})
+
+    def test_full_event_waitlists(self):
+        self.event.participants_limit = 1
+        self.event.save()
+        ParticipantFactory(event=self.event)
+        payload = {
+            "invitation": str(self.invitation.uuid),
+            "name": "John Doe",
+            "email": "john@example.com",
+        }
+        response = self.client.post(self.url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'waitlisted')
+        self.assertTrue(self.event.waitlist.filter(uuid=response.data['uuid']).exists())
+        self.assertFalse(self.event.participants.filter(email=payload['email']).exists())
+
+        response = self.client.post(self.url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'non_field_errors': [
+            "This email is already on the waitlist of this event."]})
+
+    def test_rejected_duplicate_releases_seat(self):
+        self.event.participants_limit = 2
+        self.event.save()
+        existing_participant = ParticipantFactory(event=self.event)
+        payload = {
+            "invitation": str(self.invitation.uuid),
+            "name": "John Doe",
+            "email": existing_participant.email,
+        }
+        response = self.client.post(self.url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 1)
+
+
+class InvitationAcceptConcurrencyTests(TransactionTestCase):
+    threads = 40
+
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    def test_concurrent_accepts_never_oversubscribe(self):
+        event = EventFactory(participants_limit=self.threads // 4)
+        invitation = InvitationFactory(event=event)
+        url = reverse('events:invitation-accept')
+        barrier = threading.Barrier(self.threads)
+
+        def accept(i) -> int:
+            try:
+                barrier.wait()
+                return APIClient().post(url, format='json', data={
+                    "invitation": str(invitation.uuid),
+                    "name": f"Guest {i}",
+                    "email": f"guest{i}@example.com",
+                }).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.threads) as pool:
+            codes = list(pool.map(accept, range(self.threads)))
+
+        event.refresh_from_db()
+        self.assertEqual(codes.count(status.HTTP_201_CREATED), event.participants_limit)
+        self.assertEqual(codes.count(status.HTTP_202_ACCEPTED),
+                         self.threads - event.participants_limit)
+        self.assertEqual(event.participants.count(), event.participants_limit)
+        self.assertEqual(event.participant_count, event.participants_limit)
 
 
 class InvitationDeleteTests(APITestCase):
@@ -324,6 +673,62 @@ class PersonalizedInvitationCreateTests(APITestCase):
         self.assertIn("Event edit uuid does not match", str(response.data))
 
 
+class PersonalizedInvitationBulkCreateTests(APITestCase):
+    def setUp(self):
+        self.url = reverse('events:personalized-invitation-bulk')
+        self.event = EventFactory()
+        self.payload = {
+            'event': str(self.event.uuid),
+            'event_edit_uuid': str(self.event.edit_uuid),
+            'guests': [
+                {'name': 'Ann', 'email': 'ann@example.com'},
+                {'name': 'Bob'},
+                {'name': 'Cid', 'email': 'cid@example.com'},
+            ],
+        }
+
+    def test_creates_all_invitations_in_few_queries(self):
+        with mock.patch('events.views.fan_out_invitation_emails_task'), \
+                self.assertNumQueries(2):
+            response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        guests = response.data['guests']
+        self.assertEqual([guest['name'] for guest in guests], ['Ann', 'Bob', 'Cid'])
+        self.assertEqual(
+            {str(uuid) for uuid in self.event.personalized_invitations
+             .values_list('uuid', flat=True)},
+            {str(guest['uuid']) for guest in guests})
+
+    def test_enqueues_one_fan_out_for_guests_with_email(self):
+        with mock.patch('events.views.fan_out_invitation_emails_task') as task:
+            response = self.client.post(self.url, self.payload, format='json')
+
+        uuids = {guest['name']: str(guest['uuid'])
+                 for guest in response.data['guests']}
+        task.send.assert_called_once_with(event_id=self.event.id, guests=[
+            ('ann@example.com', 'Ann', uuids['Ann']),
+            ('cid@example.com', 'Cid', uuids['Cid']),
+        ])
+
+    def test_invalid_edit_uuid_creates_nothing(self):
+        self.payload['event_edit_uuid'] = str(uuid4())
+
+        response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PersonalizedInvitation.objects.exists())
+
+    def test_invalid_guest_creates_nothing(self):
+        self.payload['guests'].append({'name': 'Dee', 'email': 'not-an-email'})
+
+        response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('guests', response.data)
+        self.assertFalse(PersonalizedInvitation.objects.exists())
+
+
 class PersonalizedInvitationAcceptTests(APITestCase):
     def setUp(self):
         self.url = reverse('events:personalized-invitation-accept')
@@ -367,8 +772,8 @@ class PersonalizedInvitationAcceptTests(APITestCase):
         }
         response = self.client.post(self.url, data=payload, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("Participant with this email already exists in this event.",
-                      str(response.data))
+        self.assertEqual(response.data, {'non_field_errors': [
+            "Participant with this email already exists in this event."]})
 
     def test_ignore_given_name(self):
         payload = {
@@ -382,6 +787,36 @@ class PersonalizedInvitationAcceptTests(APITestCase):
         self.assertEqual(self.invitation.name, response.data['name'])
         self.assertTrue(self.event.participants.filter(uuid=response.data['uuid']).exists())
 
+    def test_full_event_waitlists_and_consumes_invitation(self):
+        self.event.participants_limit = 1
+        self.event.save()
+        ParticipantFactory(event=self.event)
+        payload = {
+            "invitation": str(self.invitation.uuid),
+            "email": "john@example.com",
+        }
+        response = self.client.post(self.url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['name'], self.invitation.name)
+        self.assertFalse(PersonalizedInvitation.objects.filter(
+            uuid=self.invitation.uuid).exists())
+
+
+    def test_full_event_rejects_existing_participant(self):
+        self.event.participants_limit = 1
+        self.event.save()
+        existing_participant = ParticipantFactory(event=self.event)
+        payload = {
+            "invitation": str(self.invitation.uuid),
+            "email": existing_participant.email,
+        }
+        response = self.client.post(self.url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'non_field_errors': [
+            "Participant with this email already exists in this event."]})
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.assertTrue(PersonalizedInvitation.objects.filter(
+            uuid=self.invitation.uuid).exists())
 
 class PersonalizedInvitationDeleteTests(APITestCase):
     def setUp(self):
@@ -422,6 +857,125 @@ class LeaveEventTests(APITestCase):
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_cannot_leave_deleted_event(self):
+        Event.objects.filter(pk=self.event.pk).update(deleted_at=timezone.now())
+        url = reverse('events:event-leave', args=[self.participant.uuid])
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Participant.objects.filter(uuid=self.participant.uuid).exists())
+        self.assertEqual(Event.all_objects.get(pk=self.event.pk).participant_count, 1)
+
+    def test_leave_waitlist(self):
+        entry = WaitlistEntry.objects.create(event=self.event, name="John Doe",
+                                             email="john@example.com")
+        url = reverse('events:event-leave-waitlist', args=[entry.uuid])
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(self.event.waitlist.exists())
+
+
+class ParticipantImportTests(TempMediaMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = EventFactory()
+        self.url = reverse('events:event-admin-import',
+                           args=[self.event.uuid, self.event.edit_uuid])
+        self.file = SimpleUploadedFile('guests.csv', b'Ann,ann@example.com\n',
+                                       content_type='text/csv')
+
+    def test_upload_enqueues_import_and_links_progress(self):
+        with mock.patch('events.views.import_participants_task') as task:
+            response = self.client.post(self.url, {'file': self.file},
+                                        format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        participant_import = ParticipantImport.objects.get(event=self.event)
+        task.send.assert_called_once_with(import_id=participant_import.id)
+        self.assertEqual(response.data['status'], 'pending')
+
+        response = self.client.get(response['Location'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['uuid'], str(participant_import.uuid))
+        self.assertEqual(response.data['progress'], 0.0)
+
+    def test_progress_reports_counts_and_errors(self):
+        participant_import = ParticipantImport.objects.create(
+            event=self.event, file=self.file, size=100, status='running',
+            bytes_processed=50, rows_processed=10, created_count=9, error_count=1,
+            errors=[{'row': 4, 'error': "Enter a valid email address."}])
+        url = reverse('events:event-admin-import-detail',
+                      args=[self.event.uuid, self.event.edit_uuid,
+                            participant_import.uuid])
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.data['progress'], 0.5)
+        self.assertEqual(response.data['created_count'], 9)
+        self.assertEqual(response.data['errors'][0]['row'], 4)
+
+    def test_wrong_edit_uuid_is_not_found(self):
+        url = reverse('events:event-admin-import', args=[self.event.uuid, uuid4()])
+
+        response = self.client.post(url, {'file': self.file}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(ParticipantImport.objects.exists())
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.event = EventFactory()
+        self.participants = [
+            ParticipantFactory(event=self.event, name=name, email=f'{i}@example.com')
+            for i, name in enumerate(['Ann', 'Bob, Jr.', '=HYPERLINK("x")'])]
+        self.comment = CommentFactory(event=self.event, author=self.participants[0],
+                                      parent=None, content='Hello\nworld')
+        self.reply = CommentFactory(event=self.event, author=self.participants[1],
+                                    parent=self.comment, content='Hi')
+
+    def url(self, name, file_format, edit_uuid=None):
+        return reverse('events:event-admin-export', args=[
+            self.event.uuid, edit_uuid or self.event.edit_uuid, name, file_format])
+
+    def download(self, name, file_format):
+        response = self.client.get(self.url(name, file_format))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_participants_csv(self):
+        content = self.download('participants', 'csv')
+
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], ['uuid', 'name', 'email'])
+        self.assertEqual([row[1] for row in rows[1:]],
+                         ['Ann', 'Bob, Jr.', '\'=HYPERLINK("x")'])
+        self.assertEqual(rows[1][0], str(self.participants[0].uuid))
+
+    def test_comments_ndjson(self):
+        content = self.download('comments', 'ndjson')
+
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([line['content'] for line in lines], ['Hello\nworld', 'Hi'])
+        self.assertEqual(lines[1]['parent'], str(self.comment.uuid))
+        self.assertEqual(lines[1]['author_email'], '1@example.com')
+
+    def test_rows_are_fetched_in_chunks(self):
+        ParticipantFactory.create_batch(5, event=self.event)
+        response = self.client.get(self.url('participants', 'ndjson'))
+
+        with mock.patch.object(exports, 'CHUNK_SIZE', 3):
+            chunks = list(response.streaming_content)
+
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [3, 3, 2])
+
+    def test_unknown_export_or_wrong_edit_uuid_is_not_found(self):
+        for url in (self.url('invitations', 'csv'), self.url('participants', 'xlsx'),
+                    self.url('participants', 'csv', edit_uuid=uuid4())):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code,
+                                 status.HTTP_404_NOT_FOUND)
+
 
 class DeleteParticipantAsAdminTest(APITestCase):
     def setUp(self):
@@ -465,6 +1019,32 @@ class CommentViewSetTests(APITestCase):
         comment_data = response.data[0]
         self.assertEqual(self.comment.content, comment_data['content'])
 
+    def test_create_comment(self):
+        author = ParticipantFactory(event=self.event)
+        reply = {
+            'event': self.event_uuid,
+            'parent': self.comment_uuid,
+            'author_uuid': str(author.uuid),
+            'content': 'Reply',
+        }
+        response = self.client.post(reverse('events:comment-list'), reply,
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['author'], author.name)
+        self.assertTrue(self.comment.replies.filter(content='Reply').exists())
+
+    def test_create_comment_author_not_participant(self):
+        other_event_participant = ParticipantFactory()
+        payload = {
+            'event': self.event_uuid,
+            'author_uuid': str(other_event_participant.uuid),
+            'content': 'Hello',
+        }
+        response = self.client.post(reverse('events:comment-list'), payload,
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Author must be a participant of the event.", str(response.data))
+
     def test_list_by_event_invalid_event_uuid(self):
         url = reverse('events:comment-list-by-event',
                       kwargs={'event_uuid': str(uuid4())})
@@ -505,3 +1085,454 @@ class CommentViewSetTests(APITestCase):
         })
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class EventQueryCountTests(APITestCase):
+    def setUp(self):
+        self.event = EventFactory()
+
+    def populate(self, size):
+        participants = ParticipantFactory.create_batch(size, event=self.event)
+        InvitationFactory.create_batch(size, event=self.event)
+        PersonalizedInvitationFactory.create_batch(size, event=self.event)
+        for participant in participants:
+            parent = None
+            for _ in range(3):
+                parent = CommentFactory(event=self.event, author=participant,
+                                        parent=parent)
+
+    def test_event_detail_query_count_is_constant(self):
+        url = reverse('events:event-detail', args=[self.event.uuid])
+        self.populate(2)
+        # Event, participants, comments, and the version check before caching
+        with self.assertNumQueries(4):
+            small = self.client.get(url)
+        self.populate(20)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small.data['comments']), 6)
+        self.assertEqual(len(response.data['comments']), 66)
+        root = next(c for c in response.data['comments'] if c['parent'] is None)
+        self.assertEqual(len(root['replies']), 1)
+        self.assertEqual(len(root['replies'][0]['replies']), 1)
+
+    def test_event_admin_detail_query_count_is_constant(self):
+        url = reverse('events:event-admin-detail',
+                      args=[self.event.uuid, self.event.edit_uuid])
+        self.populate(2)
+        with self.assertNumQueries(5):
+            self.client.get(url)
+        self.populate(20)
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['participants']), 22)
+        self.assertEqual(len(response.data['invitations']), 22)
+        self.assertEqual(len(response.data['personalized_invitations']), 22)
+
+
+class CommentTreeTests(APITestCase):
+    def setUp(self):
+        self.event = EventFactory()
+        self.author = ParticipantFactory(event=self.event)
+        self.root = CommentFactory(event=self.event, author=self.author, parent=None)
+        self.replies = CommentFactory.create_batch(5, event=self.event,
+                                                   author=self.author,
+                                                   parent=self.root)
+        self.nested = CommentFactory(event=self.event, author=self.author,
+                                     parent=self.replies[0])
+        self.url = reverse('events:comment-list-by-event',
+                           kwargs={'event_uuid': str(self.event.uuid)})
+
+    def test_list_by_event_returns_whole_tree_in_constant_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        root = response.data[0]
+        self.assertEqual(root['author'], self.author.name)
+        self.assertEqual(len(root['replies']), 5)
+        self.assertEqual(root['more_replies'], 0)
+        first_reply = root['replies'][0]
+        self.assertEqual(str(first_reply['parent']), str(self.root.uuid))
+        self.assertEqual(str(first_reply['replies'][0]['uuid']), str(self.nested.uuid))
+
+    def test_list_by_event_truncates_replies(self):
+        response = self.client.get(self.url, {'replies': 3})
+        root = response.data[0]
+        self.assertEqual(len(root['replies']), 3)
+        self.assertEqual(root['more_replies'], 2)
+
+    def test_list_by_event_limits_depth(self):
+        response = self.client.get(self.url, {'depth': 1})
+        first_reply = response.data[0]['replies'][0]
+        self.assertEqual(first_reply['replies'], [])
+        self.assertEqual(first_reply['more_replies'], 1)
+
+    def test_list_by_event_invalid_limit(self):
+        response = self.client.get(self.url, {'depth': -1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EventPaginationTests(APITestCase):
+    def setUp(self):
+        self.event = EventFactory()
+        self.participants = ParticipantFactory.create_batch(5, event=self.event)
+        self.comments = [
+            CommentFactory(event=self.event, author=self.participants[0], parent=None)
+            for _ in range(5)
+        ]
+
+    def collect(self, url):
+        results = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results.extend(response.data['results'])
+            url = response.data['next']
+        return results
+
+    def test_participants_are_paginated_by_cursor(self):
+        url = reverse('events:event-participants', args=[self.event.uuid])
+        results = self.collect(f'{url}?page_size=2')
+        self.assertEqual([p['id'] for p in results],
+                         [p.id for p in self.participants])
+
+    def test_comments_are_paginated_by_cursor(self):
+        url = reverse('events:event-comments', args=[self.event.uuid])
+        results = self.collect(f'{url}?page_size=2')
+        self.assertEqual([str(c['uuid']) for c in results],
+                         [str(c.uuid) for c in self.comments])
+        self.assertNotIn('replies', results[0])
+
+    def test_summary_returns_counts_and_first_pages(self):
+        url = reverse('events:event-summary', args=[self.event.uuid])
+        response = self.client.get(f'{url}?page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['participant_count'], 5)
+        self.assertEqual(response.data['comment_count'], 5)
+        self.assertEqual(len(response.data['participants']['results']), 2)
+        self.assertEqual(len(response.data['comments']['results']), 2)
+        next_page = self.client.get(response.data['comments']['next'])
+        self.assertEqual(len(next_page.data['results']), 2)
+
+    def test_summary_ignores_request_cursor(self):
+        url = reverse('events:event-summary', args=[self.event.uuid])
+        first = self.client.get(f'{url}?page_size=2').data
+        cursor = parse_qs(urlparse(first['comments']['next']).query)['cursor'][0]
+
+        response = self.client.get(url, {'page_size': 2, 'cursor': cursor})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['participants'], first['participants'])
+        self.assertEqual(response.data['comments'], first['comments'])
+
+
+class EventIcsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = EventFactory()
+        ParticipantFactory.create_batch(3, event=self.event)
+        self.url = reverse('events:event-convert-to-ics', args=[self.event.uuid])
+
+    def test_ics_is_cached_per_event_version(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertTrue(first.streaming)
+        first_content = b''.join(first.streaming_content)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertFalse(second.streaming)
+        self.assertEqual(second.content, first_content)
+
+        participant = ParticipantFactory(event=self.event)
+        third = self.client.get(self.url)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+        self.assertIn(participant.email.encode(), b''.join(third.streaming_content))
+
+    def test_if_none_match_returns_not_modified(self):
+        first = self.client.get(self.url)
+        b''.join(first.streaming_content)
+        etag = first['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        self.client.delete(reverse('events:event-leave',
+                                   args=[self.event.participants.first().uuid]))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_ics_matches_ics_library_output(self):
+        self.event.description = "Bring snacks; drinks, and\nmusic"
+        self.event.save()
+        ParticipantFactory(event=self.event, name="")
+        participants = list(self.event.participants.all())
+        calendar = ics.Calendar()
+        calendar.events.add(ics.Event(
+            name=self.event.name,
+            begin=self.event.start_datetime,
+            end=self.event.end_datetime,
+            description=self.event.description,
+            location=self.event.location,
+            url=self.event.link,
+            uid=str(self.event.uuid),
+            attendees=[ics.Attendee(email=p.email, common_name=p.name)
+                       for p in participants],
+            organizer=ics.Organizer(email=self.event.organizer_email,
+                                    common_name=self.event.organizer_name),
+        ))
+        expected = calendar.serialize().split('\r\n')
+
+        content = event_to_ics(self.event).replace('\r\n ', '').split('\r\n')
+
+        # ics keeps attendees in a set, so compare them regardless of order
+        self.assertEqual(sorted(content), sorted(expected))
+        attendees = [line for line in content if line.startswith('ATTENDEE')]
+        self.assertEqual([line.rsplit(':', 1)[1] for line in attendees],
+                         [p.email for p in sorted(participants, key=lambda p: p.id)])
+
+    def test_long_lines_are_folded(self):
+        self.event.description = "zażółć gęślą jaźń " * 20
+        self.event.save()
+
+        content = event_to_ics(self.event)
+
+        lines = content.split('\r\n')
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertTrue(any(line.startswith(' ') for line in lines))
+        unfolded = content.replace('\r\n ', '')
+        self.assertIn(f'DESCRIPTION:{self.event.description}', unfolded.split('\r\n'))
+
+    def test_line_breaks_are_escaped_as_newlines(self):
+        self.event.description = "First\r\nsecond\rthird\nfourth"
+        self.event.save()
+
+        lines = event_to_ics(self.event).replace('\r\n ', '').split('\r\n')
+
+        self.assertIn('DESCRIPTION:First\\nsecond\\nthird\\nfourth', lines)
+
+
+class CalendarFeedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.email = 'guest@example.com'
+        self.events = EventFactory.create_batch(3)
+        self.participants = [ParticipantFactory(event=event, email=self.email)
+                             for event in self.events]
+        ParticipantFactory(email=self.email.upper())
+        token_url = reverse('events:event-feed-token',
+                            args=[self.participants[0].uuid])
+        self.url = self.client.get(token_url).data['url']
+
+    def test_feed_combines_all_events_of_email(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/calendar')
+        content = response.content.decode()
+        self.assertTrue(content.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(content.count('BEGIN:VEVENT'), len(self.events))
+        for event in self.events:
+            self.assertIn(f'UID:{event.uuid}', content)
+            self.assertIn(event_to_ics(event).split('\r\n', 3)[3]
+                          .rsplit('\r\n', 1)[0], content)
+
+    def test_feed_renders_only_changed_events(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        ParticipantFactory(event=self.events[0])
+        # One query for the events and one for the changed event's attendees
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.content.decode().count('ATTENDEE'), 4)
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.participants[1].delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content.decode().count('BEGIN:VEVENT'), 2)
+
+    def test_forged_token_is_rejected(self):
+        url = reverse('events:event-calendar-feed', args=['forged:token'])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_feed_token_for_unknown_participant(self):
+        url = reverse('events:event-feed-token', args=[uuid4()])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class EventCacheTests(APITestCase):
+    def setUp(self):
+        event_cache.get_cache().clear()
+        self.event = EventFactory(participants_limit=None)
+        self.participant = ParticipantFactory(event=self.event)
+        self.url = reverse('events:event-detail', args=[self.event.uuid])
+
+    def assertRefreshed(self, *, miss=True):  # noqa: N802
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS' if miss else 'HIT')
+        return response
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.assertRefreshed()
+        with self.assertNumQueries(1):
+            second = self.assertRefreshed(miss=False)
+        self.assertEqual(second.data, first.data)
+
+    def test_changes_missing_an_invalidation_are_not_served(self):
+        # As made by another process with its own cache
+        self.assertRefreshed()
+        with mock.patch.object(event_cache, 'invalidate'):
+            self.client.patch(reverse('events:event-admin-detail',
+                                      args=[self.event.uuid, self.event.edit_uuid]),
+                              {'name': 'Renamed'}, format='json')
+        self.assertEqual(self.assertRefreshed().data['name'], 'Renamed')
+        self.assertRefreshed(miss=False)
+
+        Event.objects.filter(pk=self.event.pk).update(deleted_at=timezone.now())
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_child_mutations_invalidate(self):
+        self.assertRefreshed()
+        ParticipantFactory(event=self.event)
+        response = self.assertRefreshed()
+        self.assertEqual(len(response.data['participants']), 2)
+
+        comment = CommentFactory(event=self.event, author=self.participant,
+                                 parent=None)
+        response = self.assertRefreshed()
+        self.assertEqual(response.data['comment_count'], 1)
+
+        comment.content = 'Edited'
+        comment.save()
+        response = self.assertRefreshed()
+        self.assertEqual(response.data['comments'][0]['content'], 'Edited')
+
+        self.client.delete(reverse('events:event-leave', args=[self.participant.uuid]))
+        response = self.assertRefreshed()
+        self.assertEqual(response.data['participant_count'], 1)
+        self.assertEqual(response.data['comments'], [])
+
+    def test_accept_and_promotion_invalidate(self):
+        self.assertRefreshed()
+        invitation = InvitationFactory(event=self.event)
+        self.client.post(reverse('events:invitation-accept'), format='json', data={
+            'invitation': str(invitation.uuid),
+            'name': 'John Doe',
+            'email': 'john@example.com',
+        })
+        self.assertEqual(self.assertRefreshed().data['participant_count'], 2)
+
+        WaitlistEntry.objects.create(event=self.event, name='Jane Doe',
+                                     email='jane@example.com')
+        self.assertRefreshed(miss=False)
+        waitlist.promote(self.event.id)
+        self.assertEqual(self.assertRefreshed().data['participant_count'], 3)
+
+    def test_event_update_and_delete_invalidate(self):
+        self.assertRefreshed()
+        admin_url = reverse('events:event-admin-detail',
+                            args=[self.event.uuid, self.event.edit_uuid])
+        self.client.patch(admin_url, {'name': 'Renamed'}, format='json')
+        self.assertEqual(self.assertRefreshed().data['name'], 'Renamed')
+
+        self.client.delete(admin_url)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_uuid(self):
+        response = self.client.get(reverse('events:event-detail', args=['nope']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stats_require_admin(self):
+        url = reverse('events:event-cache-stats')
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.client.get(self.url)
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_authenticate(admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3})
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        event_cache.get_cache().clear()
+        self.event = EventFactory()
+        self.participant = ParticipantFactory(event=self.event)
+        self.invitation = InvitationFactory(event=self.event)
+        self.personalized = PersonalizedInvitationFactory(event=self.event)
+        self.urls = [
+            reverse('events:event-detail', args=[self.event.uuid]),
+            reverse('events:comment-list-by-event', args=[self.event.uuid]),
+            reverse('events:invitation-detail', args=[self.invitation.uuid]),
+            reverse('events:personalized-invitation-detail',
+                    args=[self.personalized.uuid]),
+        ]
+
+    def etags(self):
+        return [self.client.get(url)['ETag'] for url in self.urls]
+
+    def test_read_endpoints_send_validators(self):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response['ETag'].startswith(f'"{self.event.uuid}-'))
+            self.assertIn('Last-Modified', response)
+            self.assertEqual(response['Cache-Control'], 'no-cache')
+            self.assertEqual(response['X-Accel-Expires'], '1')
+        self.assertEqual(len(set(self.etags())), len(self.urls))
+
+    def test_if_none_match_skips_serialization(self):
+        # Each endpoint only looks up the version of the event
+        queries = [1, 1, 1, 1]
+        for url, etag, count in zip(self.urls, self.etags(), queries, strict=True):
+            with self.assertNumQueries(count):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_if_none_match_without_cached_payload(self):
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        event_cache.get_cache().clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_any_mutation_changes_etags(self):
+        before = self.etags()
+        comment = CommentFactory(event=self.event, author=self.participant,
+                                 parent=None)
+        after_comment = self.etags()
+        self.assertTrue(all(a != b for a, b in zip(before, after_comment, strict=True)))
+
+        comment.delete()
+        self.assertTrue(all(a != b for a, b in
+                            zip(after_comment, self.etags(), strict=True)))
+
+    def test_comment_limits_are_part_of_etag(self):
+        url = self.urls[1]
+        self.assertNotEqual(self.client.get(url)['ETag'],
+                            self.client.get(url, {'depth': 1})['ETag'])
@@ -0,0 +1,33 @@
+import shutil
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+
+def jpeg_upload(size=(2400, 1200), name='photo.jpg'):
+    exif = Image.Exif()
+    exif[0x0110] = 'Secret Camera'  # Model
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class TempMediaMixin:
+    """
+    Keep the media, private media and image uploads of each test in a
+    temporary directory, ``self.root``, removed after the test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(MEDIA_ROOT=self.root / 'media',
+                                     PRIVATE_MEDIA_ROOT=self.root / 'private',
+                                     IMAGE_UPLOAD_DIR=self.root / 'uploads')
+        settings.enable()
+        self.addCleanup(settings.disable)
@@ -0,0 +1,145 @@
+"""
+Resumable, chunked event image uploads.
+
+A client declares the size of the image, then sends it in chunks, each
+carrying a ``Content-Range`` header, which are streamed to a staging file
+with bounded memory. The image header is checked as soon as it has arrived,
+so a file of the wrong type or dimensions is rejected without waiting for
+the rest of it. Event create and update then only reference the finished
+upload instead of carrying the image in their own request body.
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .exceptions import InvalidUpload, UploadOffsetMismatch
+from .models import ImageUpload
+
+# Bytes read from the request body at a time
+READ_SIZE = 64 * 1024
+# Any supported image declares its format and dimensions within this prefix
+HEADER_LIMIT = 1024 * 1024
+# Pillow format name and file extension of the accepted image types
+FORMATS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'WEBP': 'webp',
+    'GIF': 'gif',
+}
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+def staging_path(upload) -> Path:
+    return Path(settings.IMAGE_UPLOAD_DIR) / f'{upload.uuid}.part'
+
+
+def start(upload) -> None:
+    """Create the empty staging file of a new upload."""
+    path = staging_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+
+def parse_content_range(header, upload) -> tuple[int, int]:
+    """Return the start offset and length of the chunk a header describes."""
+    match = CONTENT_RANGE.match(header or '')
+    if match is None:
+        msg = "Content-Range must be 'bytes <start>-<end>/<size>'."
+        raise InvalidUpload(msg)
+    first, last, total = (int(value) for value in match.groups())
+    if total != upload.size or first > last or last >= upload.size:
+        msg = f"Content-Range does not fit an upload of {upload.size} bytes."
+        raise InvalidUpload(msg)
+    length = last - first + 1
+    if length > settings.IMAGE_UPLOAD_MAX_CHUNK_SIZE:
+        msg = f"Chunks may be at most {settings.IMAGE_UPLOAD_MAX_CHUNK_SIZE} bytes."
+        raise InvalidUpload(msg)
+    return first, length
+
+
+def write_chunk(upload, stream, offset, length) -> None:
+    """
+    Stream ``length`` bytes into the upload at ``offset``, which has to be
+    where it left off. Checks the image header once it is complete and
+    finishes the upload with its last chunk.
+    """
+    if upload.completed_at is not None:
+        msg = "The upload is already complete."
+        raise InvalidUpload(msg)
+    if offset != upload.received:
+        raise UploadOffsetMismatch
+    written = 0
+    with staging_path(upload).open('r+b') as file:
+        file.seek(offset)
+        while written < length:
+            data = stream.read(min(READ_SIZE, length - written))
+            if not data:
+                break
+            file.write(data)
+            written += len(data)
+    if written != length:
+        msg = f"Received {written} of the {length} bytes announced for the chunk."
+        raise InvalidUpload(msg)
+    # Only one of two clients racing to write the same chunk moves the offset
+    if not ImageUpload.objects.filter(
+            pk=upload.pk, received=offset).update(received=offset + length):
+        raise UploadOffsetMismatch
+    upload.received = offset + length
+    if not upload.format:
+        check_header(upload)
+    if upload.received == upload.size:
+        finish(upload)
+
+
+def check_header(upload) -> None:
+    """Record the format and dimensions of the upload once they can be read."""
+    try:
+        with Image.open(staging_path(upload)) as image:
+            image_format, (width, height) = image.format, image.size
+    except Image.DecompressionBombError:
+        discard(upload)
+        msg = f"Images may have at most {settings.IMAGE_UPLOAD_MAX_PIXELS} pixels."
+        raise InvalidUpload(msg) from None
+    except (UnidentifiedImageError, OSError):
+        if upload.received < min(upload.size, HEADER_LIMIT):
+            # The header may still be incomplete
+            return
+        discard(upload)
+        raise InvalidUpload from None
+    if image_format not in FORMATS:
+        discard(upload)
+        msg = f"Images must be one of {', '.join(FORMATS)}."
+        raise InvalidUpload(msg)
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        discard(upload)
+        msg = f"Images may have at most {settings.IMAGE_UPLOAD_MAX_PIXELS} pixels."
+        raise InvalidUpload(msg)
+    upload.format, upload.width, upload.height = image_format, width, height
+    upload.save(update_fields=['format', 'width', 'height'])
+
+
+def finish(upload) -> None:
+    try:
+        with Image.open(staging_path(upload)) as image:
+            image.verify()
+    except (Image.DecompressionBombError, UnidentifiedImageError, OSError,
+            SyntaxError):
+        discard(upload)
+        raise InvalidUpload from None
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['completed_at'])
+
+
+def open_file(upload) -> File:
+    """Open a completed upload for saving it as an event image."""
+    name = f'{upload.uuid}.{FORMATS[upload.format]}'
+    return File(staging_path(upload).open('rb'), name=name)
+
+
+def discard(upload) -> None:
+    staging_path(upload).unlink(missing_ok=True)
+    upload.delete()
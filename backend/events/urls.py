@@ -14,6 +14,9 @@ router.register(r'invitation', views.InvitationViewSet, basename='invitation')
 router.register(r'personalized-invitation', views.PersonalizedInvitationViewSet,
                  basename='personalized-invitation')
 router.register(r'comment', views.CommentViewSet, basename='comment')
+router.register(r'archived-event', views.ArchivedEventViewSet,
+                 basename='archived-event')
+router.register(r'image-upload', views.ImageUploadViewSet, basename='image-upload')
 
 manual_admin_urls = [
     path('event-admin/<uuid:uuid>/<uuid:edit_uuid>/',
@@ -25,6 +28,24 @@ manual_admin_urls = [
          }),
          name='event-admin-detail'),
 
+    path('event-admin/<uuid:uuid>/<uuid:edit_uuid>/imports/',
+         views.EventAdminViewSet.as_view({
+             'post': 'import_participants',
+         }),
+         name='event-admin-import'),
+
+    path('event-admin/<uuid:uuid>/<uuid:edit_uuid>/imports/<uuid:import_uuid>/',
+         views.EventAdminViewSet.as_view({
+             'get': 'import_status',
+         }),
+         name='event-admin-import-detail'),
+
+    path('event-admin/<uuid:uuid>/<uuid:edit_uuid>/export/<slug:name>.<slug:file_format>',
+         views.EventAdminViewSet.as_view({
+             'get': 'export',
+         }),
+         name='event-admin-export'),
+
     path('event-admin/',
          views.EventAdminViewSet.as_view({
              'post': 'create',
@@ -1,32 +1,124 @@
-import ics
-
-from .models import Event, Participant
-
-
-def event_to_ics(event: Event):
-    calendar = ics.Calendar()
-    event_ics = ics.Event(
-        name=event.name,
-        begin=event.start_datetime,
-        end=event.end_datetime,
-        description=event.description,
-        location=event.location,
-        url=event.link,
-        uid=str(event.uuid),
-        attendees=[
-            participant_to_ics_atendee(participant)
-            for participant in event.participants.all()
-        ],
-        organizer=ics.Organizer(
-            email=event.organizer_email,
-            common_name=event.organizer_name,
-        ),
-    )
-    calendar.events.add(event_ics)
-    return calendar.serialize()
-
-def participant_to_ics_atendee(participant: Participant):
-    return ics.Attendee(
-        email=participant.email,
-        common_name=participant.name,
-    )
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import ics_writer
+from .models import Event
+
+ICS_CACHE_TIMEOUT = 60 * 60 * 24
+# Calendars larger than this are streamed on every request instead of cached
+ICS_CACHE_MAX_SIZE = 1024 * 1024
+ATTENDEE_CHUNK_SIZE = 2000
+CALENDAR_FEED_SALT = 'events.calendar-feed'
+
+
+def event_version(event: Event) -> int:
+    """Return a number that changes on any change to the event or its children."""
+    return int(event.updated_at.timestamp() * 1_000_000)
+
+
+def event_etag(event: Event, *parts) -> str:
+    return '"{}"'.format('-'.join(map(str, [event.uuid, event_version(event), *parts])))
+
+
+def not_modified(request, etag, updated_at):
+    """Return a 304 response if the client's copy is current, else None."""
+    return get_conditional_response(request, etag=etag,
+                                    last_modified=int(updated_at.timestamp()))
+
+
+def add_cache_headers(response, etag, updated_at):
+    """
+    Let browsers revalidate on every use, and let nginx serve the response
+    to identical requests for API_MICROCACHE_SECONDS.
+    """
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(updated_at.timestamp())
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Expires'] = settings.API_MICROCACHE_SECONDS
+    return response
+
+
+def ics_cache_key(event: Event) -> str:
+    return f'ics:{event.uuid}:{event_version(event)}'
+
+
+def event_attendees(event: Event):
+    return (event.participants.order_by('id').values_list('email', 'name')
+            .iterator(chunk_size=ATTENDEE_CHUNK_SIZE))
+
+
+def iter_event_ics(event: Event):
+    """
+    Yield the ICS for an event in chunks, reading attendees from the database
+    with a server-side cursor so memory stays flat for large events.
+    """
+    return ics_writer.iter_calendar(
+        ics_writer.vevent_lines(event, event_attendees(event)))
+
+
+def iter_cached_event_ics(event: Event):
+    """
+    Stream the ICS for an event and store it in the cache once complete,
+    unless it grew past ICS_CACHE_MAX_SIZE.
+    """
+    chunks = []
+    size = 0
+    for chunk in iter_event_ics(event):
+        if chunks is not None:
+            size += len(chunk)
+            chunks.append(chunk)
+            if size > ICS_CACHE_MAX_SIZE:
+                chunks = None
+        yield chunk
+    if chunks is not None:
+        cache.set(ics_cache_key(event), ''.join(chunks), ICS_CACHE_TIMEOUT)
+
+
+def event_to_ics(event: Event) -> str:
+    return ''.join(iter_event_ics(event))
+
+
+def calendar_feed_token(email: str) -> str:
+    return signing.dumps(email, salt=CALENDAR_FEED_SALT)
+
+
+def calendar_feed_email(token: str) -> str:
+    """Return the email a feed token was issued for; raise BadSignature if forged."""
+    return signing.loads(token, salt=CALENDAR_FEED_SALT)
+
+
+def calendar_feed_events(email: str):
+    return (Event.objects.filter(participants__email=email)
+            .order_by('start_datetime', 'id'))
+
+
+def calendar_feed_etag(events) -> str:
+    versions = ','.join(f'{event.uuid}:{event_version(event)}' for event in events)
+    return f'"{hashlib.md5(versions.encode()).hexdigest()}"'
+
+
+def cached_vevents(events) -> list[str]:
+    """
+    Return the VEVENT fragment of every event, rendering and caching only
+    those whose current version is not in the cache yet.
+    """
+    keys = {event: f'ics:vevent:{event.uuid}:{event_version(event)}'
+            for event in events}
+    fragments = cache.get_many(keys.values())
+    missing = {}
+    for event, key in keys.items():
+        if key not in fragments:
+            fragments[key] = missing[key] = ics_writer.vevent(
+                event, event_attendees(event))
+    if missing:
+        cache.set_many(missing, ICS_CACHE_TIMEOUT)
+    return [fragments[keys[event]] for event in events]
+
+
+def calendar_feed(events) -> str:
+    return ics_writer.calendar(cached_vevents(events))
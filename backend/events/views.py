@@ -1,36 +1,105 @@
 import datetime
 import logging
 
-from django.http import Http404, HttpResponse
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
-from .models import Comment, Event, Invitation, Participant, PersonalizedInvitation
+from . import event_cache, exports, imports, uploads
+from .comment_tree import CommentTree
+from .exceptions import InvalidUpload
+from .models import (
+    ArchivedEvent,
+    Comment,
+    Event,
+    ImageUpload,
+    Invitation,
+    Participant,
+    ParticipantImport,
+    PersonalizedInvitation,
+    WaitlistEntry,
+)
+from .pagination import CommentCursorPagination, ParticipantCursorPagination
 from .serializers import (
+    ArchivedEventSerializer,
+    CalendarFeedSerializer,
+    CommentPageSerializer,
     CommentSerializer,
+    CommentTreeQuerySerializer,
     EventAdminSerializer,
+    EventCacheStatsSerializer,
     EventSerializer,
+    EventSummarySerializer,
+    ImageUploadSerializer,
     InvitationAcceptSerializer,
     InvitationCreateSerializer,
     InvitationDetailsSerializer,
+    ParticipantImportSerializer,
+    ParticipantSerializer,
     PersInvAcceptSerializer,
+    PersInvBulkCreateSerializer,
     PersInvCreateSerializer,
     PersInvDetailsSerializer,
+    absolute_media_url,
+    image_srcset,
 )
 from .tasks import (
+    fan_out_event_update_task,
+    fan_out_invitation_emails_task,
+    import_participants_task,
+    process_event_image_task,
+    promote_waitlist_task,
+    purge_event_task,
     send_event_admin_link_task,
-    send_event_cancellation_notification_task,
     send_event_invite_email_task,
-    send_event_update_notification_task,
 )
-from .utils import event_to_ics
+from .utils import (
+    add_cache_headers,
+    calendar_feed,
+    calendar_feed_email,
+    calendar_feed_etag,
+    calendar_feed_events,
+    calendar_feed_token,
+    event_etag,
+    ics_cache_key,
+    iter_cached_event_ics,
+    not_modified,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def process_image(event):
+    """Enqueue rendition processing for the event's newly set or cleared image."""
+    try:
+        process_event_image_task.send(event_id=event.id,
+                                      image_name=event.image.name or '')
+    except Exception:
+        logger.exception("Failed to enqueue image processing for event %s",
+                         event.uuid)
+
+
+def promote_waitlist(event_id):
+    """Enqueue a waitlist promotion for an event if anyone is waiting."""
+    if not WaitlistEntry.objects.filter(event_id=event_id).exists():
+        return
+    try:
+        promote_waitlist_task.send(event_id=event_id)
+    except Exception:
+        logger.exception("Failed to enqueue waitlist promotion for event %s", event_id)
+
+
 class EventAdminViewSet(mixins.CreateModelMixin,
                         mixins.UpdateModelMixin,
                         mixins.RetrieveModelMixin,
@@ -40,9 +109,23 @@ class EventAdminViewSet(mixins.CreateModelMixin,
     serializer_class = EventAdminSerializer
     lookup_field = 'uuid'
 
+    def get_serializer_class(self):
+        if self.action in ('import_participants', 'import_status'):
+            return ParticipantImportSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                *self.get_serializer_class().get_prefetch_lookups())
+        return queryset
+
     def perform_create(self, serializer):
         event = serializer.save()
         logger.info("New event created: %s", str(event))
+        if event.image:
+            process_image(event)
         try:
             send_event_admin_link_task.send(
                 creator_email=event.organizer_email,
@@ -66,22 +149,19 @@ class EventAdminViewSet(mixins.CreateModelMixin,
         return super().update(request, *args, **kwargs)
 
     def perform_update(self, serializer):
+        old_limit = serializer.instance.participants_limit
+        old_image = serializer.instance.image.name
         updated = serializer.save()
-        participants = list(updated.participants.all())
+        if updated.image.name != old_image:
+            process_image(updated)
+        if old_limit is not None and (updated.participants_limit is None
+                                      or updated.participants_limit > old_limit):
+            promote_waitlist(updated.id)
         try:
-            for participant in participants:
-                send_event_update_notification_task.send(
-                    participant_email=participant.email,
-                    participant_name=participant.name,
-                    event_name=updated.name,
-                    event_uuid=str(updated.uuid),
-                )
+            fan_out_event_update_task.send(event_id=updated.id)
         except Exception:
-            logger.exception(
-                "Failed to enqueue update task for participant %s event %s",
-                participant.email,
-                updated.uuid,
-            )
+            logger.exception("Failed to enqueue update fan-out for event %s",
+                             updated.uuid)
 
     def destroy(self, request, *args, **kwargs):
         edit_uuid = kwargs.get('edit_uuid')
@@ -92,30 +172,27 @@ class EventAdminViewSet(mixins.CreateModelMixin,
         return super().destroy(request, *args, **kwargs)
 
     def perform_destroy(self, instance):
-        participants = list(instance.participants.all())
-        name = instance.name
-        instance.delete()
+        """
+        Hide the event at once and leave notifying its participants and
+        removing its rows, which takes long for big events, to the purge job.
+        """
+        now = timezone.now()
+        Event.objects.filter(pk=instance.pk).update(deleted_at=now, updated_at=now)
+        event_cache.invalidate(instance.uuid)
         logger.info("Event deleted: %s", str(instance))
         try:
-            for participant in participants:
-                send_event_cancellation_notification_task.send(
-                    participant_email=participant.email,
-                    participant_name=participant.name,
-                    event_name=name,
-                )
+            purge_event_task.send(event_id=instance.id)
         except Exception:
-            logger.exception(
-                "Failed to enqueue cancellation task for participant %s event %s",
-                participant.email,
-                instance.uuid,
-            )
+            logger.exception("Failed to enqueue purge of event %s, run "
+                             "`manage.py purge_deleted_events`", instance.uuid)
 
-    def retrieve(self, request, *args, **kwargs):
+    def retrieve(self, request, *args, **kwargs):  # noqa: ARG002
         edit_uuid = kwargs.get('edit_uuid')
         instance = self.get_object()
         if not edit_uuid or str(instance.edit_uuid) != str(edit_uuid):
              raise Http404
-        return super().retrieve(request, *args, **kwargs)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
 
     @action(methods=['delete'], detail=False)
     def remove_participant(self, request, id, edit_uuid, format=None):  # noqa: A002, ARG002
@@ -123,14 +200,124 @@ class EventAdminViewSet(mixins.CreateModelMixin,
         if str(participant.event.edit_uuid) != str(edit_uuid):
             raise Http404
         participant.delete()
+        promote_waitlist(participant.event_id)
         return Response(status=204)
 
+    @extend_schema(
+        summary="Import participants from a name,email CSV in the background",
+        request={'multipart/form-data': ParticipantImportSerializer},
+        responses={202: ParticipantImportSerializer},
+    )
+    @action(methods=['post'], detail=True)
+    def import_participants(self, request, uuid, edit_uuid, format=None):  # noqa: A002, ARG002
+        event = self.get_object()
+        if str(event.edit_uuid) != str(edit_uuid):
+            raise Http404
+        context = {**self.get_serializer_context(), 'event': event}
+        serializer = self.get_serializer(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+        participant_import = serializer.save()
+        try:
+            import_participants_task.send(import_id=participant_import.id)
+        except Exception:
+            logger.exception("Failed to enqueue participant import %s",
+                             participant_import.uuid)
+            imports.fail(participant_import, "The import could not be started.")
+            participant_import.refresh_from_db()
+        location = reverse('events:event-admin-import-detail',
+                           args=[event.uuid, event.edit_uuid, participant_import.uuid])
+        return Response(self.get_serializer(participant_import).data, status=202,
+                        headers={'Location': location})
+
+    @extend_schema(summary="Progress and row errors of a participant import")
+    @action(methods=['get'], detail=True)
+    def import_status(self, request, uuid, edit_uuid, import_uuid, format=None):  # noqa: A002, ARG002
+        event = self.get_object()
+        if str(event.edit_uuid) != str(edit_uuid):
+            raise Http404
+        participant_import = get_object_or_404(ParticipantImport, event=event,
+                                               uuid=import_uuid)
+        return Response(self.get_serializer(participant_import).data)
+
+    @extend_schema(
+        summary="Stream the participants or comments of an event as CSV or NDJSON",
+        responses={
+            200: OpenApiResponse(description='One row or JSON object per line'),
+            404: OpenApiResponse(description='Unknown event, edit uuid or export'),
+        },
+    )
+    @action(methods=['get'], detail=True)
+    def export(self, request, *args, **kwargs):  # noqa: ARG002
+        name, file_format = kwargs['name'], kwargs['file_format']
+        if name not in exports.EXPORTS or file_format not in exports.CONTENT_TYPES:
+            raise Http404
+        event = self.get_object()
+        if str(event.edit_uuid) != str(kwargs['edit_uuid']):
+            raise Http404
+        response = StreamingHttpResponse(
+            exports.iter_export(name, file_format, event.id),
+            content_type=exports.CONTENT_TYPES[file_format])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{event.uuid}-{name}.{file_format}"')
+        response['Cache-Control'] = 'private, no-store'
+        # Lets nginx pass chunks on as they are produced
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class ImageUploadViewSet(mixins.CreateModelMixin,
+                         mixins.RetrieveModelMixin,
+                         viewsets.GenericViewSet):
+    """
+    Resumable event image uploads: create one with the image size, PATCH its
+    chunks in order and retrieve it to learn where to resume.
+    """
 
-class InvitationViewSet(mixins.CreateModelMixin,
+    queryset = ImageUpload.objects.all()
+    serializer_class = ImageUploadSerializer
+    lookup_field = 'uuid'
+
+    def perform_create(self, serializer):
+        uploads.start(serializer.save())
+
+    @extend_schema(
+        summary="Append a chunk to an upload",
+        request={'application/octet-stream': OpenApiTypes.BINARY},
+        parameters=[OpenApiParameter(
+            'Content-Range', location=OpenApiParameter.HEADER, required=True,
+            description="bytes <start>-<end>/<size>, start at the current offset")],
+    )
+    def partial_update(self, request, *args, **kwargs):  # noqa: ARG002
+        upload = self.get_object()
+        offset, length = uploads.parse_content_range(
+            request.headers.get('Content-Range'), upload)
+        if request.META.get('CONTENT_LENGTH') != str(length):
+            msg = "Content-Length must match the Content-Range."
+            raise InvalidUpload(msg)
+        uploads.write_chunk(upload, request.stream, offset, length)
+        return Response(self.get_serializer(upload).data)
+
+
+class InvitationRetrieveMixin:
+    """Retrieve an invitation with caching headers derived from its event's version."""
+
+    def retrieve(self, request, *args, **kwargs):  # noqa: ARG002
+        invitation = self.get_object()
+        event = invitation.event
+        etag = event_etag(event, 'invitation', invitation.uuid)
+        response = not_modified(request, etag, event.updated_at)
+        if response is None:
+            response = Response(self.get_serializer(invitation).data)
+        return add_cache_headers(response, etag, event.updated_at)
+
+
+class InvitationViewSet(InvitationRetrieveMixin,
+                        mixins.CreateModelMixin,
                         mixins.RetrieveModelMixin,
                         viewsets.GenericViewSet):
 
-    queryset = Invitation.objects.all()
+    queryset = (Invitation.objects.filter(event__deleted_at__isnull=True)
+                .select_related('event'))
     lookup_field = 'uuid'
 
     def get_serializer_class(self):
@@ -153,16 +340,19 @@ class InvitationViewSet(mixins.CreateModelMixin,
     def accept(self, request, format=None):  # noqa: A002, ARG002
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=201)
+            instance = serializer.save()
+            waitlisted = isinstance(instance, WaitlistEntry)
+            return Response(serializer.data, status=202 if waitlisted else 201)
         return Response(serializer.errors, status=400)
 
 
-class PersonalizedInvitationViewSet(mixins.CreateModelMixin,
+class PersonalizedInvitationViewSet(InvitationRetrieveMixin,
+                        mixins.CreateModelMixin,
                         mixins.RetrieveModelMixin,
                         viewsets.GenericViewSet):
 
-    queryset = PersonalizedInvitation.objects.all()
+    queryset = (PersonalizedInvitation.objects.filter(event__deleted_at__isnull=True)
+                .select_related('event'))
     lookup_field = 'uuid'
 
     def get_serializer_class(self):
@@ -170,8 +360,27 @@ class PersonalizedInvitationViewSet(mixins.CreateModelMixin,
             return PersInvAcceptSerializer
         if self.action == 'retrieve':
             return PersInvDetailsSerializer
+        if self.action == 'bulk':
+            return PersInvBulkCreateSerializer
         return PersInvCreateSerializer
 
+    @extend_schema(summary="Invite many named guests, emailing those with an address")
+    @action(methods=['POST'], detail=False)
+    def bulk(self, request, format=None):  # noqa: A002, ARG002
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        emails = [(guest['email'], guest['name'], str(guest['uuid']))
+                  for guest in result['guests'] if guest['email']]
+        if emails:
+            try:
+                fan_out_invitation_emails_task.send(event_id=result['event'].id,
+                                                    guests=emails)
+            except Exception:
+                logger.exception("Failed to enqueue invitation emails for event %s",
+                                 result['event'].uuid)
+        return Response(serializer.data, status=201)
+
     @action(methods=['DELETE'], detail=False,
             url_path='remove/(?P<uuid>[^/.]+)/(?P<edit_uuid>[^/.]+)')
     def remove(self, request, uuid, edit_uuid):  # noqa: ARG002
@@ -185,8 +394,9 @@ class PersonalizedInvitationViewSet(mixins.CreateModelMixin,
     def accept(self, request, format=None):  # noqa: A002, ARG002
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=201)
+            instance = serializer.save()
+            waitlisted = isinstance(instance, WaitlistEntry)
+            return Response(serializer.data, status=202 if waitlisted else 201)
         return Response(serializer.errors, status=400)
 
 
@@ -197,6 +407,57 @@ class EventViewSet(mixins.RetrieveModelMixin,
     lookup_field = 'uuid'
     serializer_class = EventSerializer
 
+    def retrieve(self, request, *args, **kwargs):  # noqa: ARG002
+        uuid = event_cache.parse_uuid(kwargs['uuid'])
+        if uuid is None:
+            raise Http404
+        payload = event_cache.get(uuid)
+        cache_status = 'HIT'
+        if payload is None:
+            cache_status = 'MISS'
+            # Prefetching is left to the serializer, so a 304 skips it
+            event = self.get_object()
+            etag = event_etag(event, 'event')
+            response = not_modified(request, etag, event.updated_at)
+            if response is not None:
+                return add_cache_headers(response, etag, event.updated_at)
+            payload = {
+                'data': self.get_serializer(event).data,
+                # Absolute image URLs depend on the request, so only paths
+                # are cached
+                'image': event.image.url if event.image else None,
+                'renditions': event.image_renditions,
+                'etag': etag,
+                'updated_at': event.updated_at,
+            }
+            # Only cache the payload under this version if no change slipped
+            # in while it was being serialized, nor is missing on a lagging
+            # replica it was read from
+            if (Event.objects.using(DEFAULT_DB_ALIAS)
+                    .filter(pk=event.pk, updated_at=event.updated_at).exists()):
+                event_cache.store(uuid, payload)
+        else:
+            response = not_modified(request, payload['etag'], payload['updated_at'])
+            if response is not None:
+                return add_cache_headers(response, payload['etag'],
+                                         payload['updated_at'])
+        image = payload['image'] and absolute_media_url(request, payload['image'])
+        srcset = image_srcset(request, payload['renditions'])
+        response = Response({**payload['data'], 'image': image, 'image_srcset': srcset})
+        response['X-Cache'] = cache_status
+        return add_cache_headers(response, payload['etag'], payload['updated_at'])
+
+    @extend_schema(
+        summary="Hit and miss counts of the public event payload cache",
+        responses=EventCacheStatsSerializer,
+    )
+    @action(methods=['GET'], detail=False, url_path='cache-stats',
+            serializer_class=EventCacheStatsSerializer,
+            permission_classes=[IsAdminUser])
+    def cache_stats(self, request, format=None):  # noqa: A002, ARG002
+        serializer = self.get_serializer(event_cache.stats())
+        return Response(serializer.data)
+
     @extend_schema(
         summary="Download event as ICS file",
         description="Returns an iCalendar (.ics) file for the given event UUID.",
@@ -214,23 +475,128 @@ class EventViewSet(mixins.RetrieveModelMixin,
                 response=None,
                 description='ICS calendar file for the event',
             ),
+            304: OpenApiResponse(description='ICS has not changed (If-None-Match)'),
             404: OpenApiResponse(description='Event not found'),
         },
     )
     @action(methods=['GET'], detail=False, url_path='ics/(?P<uuid>[^/.]+)')
     def convert_to_ics(self, request, uuid, format=None):  # noqa: A002, ARG002
         event = self.get_object()
-        ics_content = event_to_ics(event)
-        response = HttpResponse(ics_content, content_type='text/calendar')
-        response['Content-Disposition'] = f'attachment; filename="{event.name}.ics"'
+        etag = event_etag(event, 'ics')
+        response = not_modified(request, etag, event.updated_at)
+        if response is None:
+            content = cache.get(ics_cache_key(event))
+            if content is None:
+                response = StreamingHttpResponse(iter_cached_event_ics(event),
+                                                 content_type='text/calendar')
+            else:
+                response = HttpResponse(content, content_type='text/calendar')
+            response['Content-Disposition'] = (
+                f'attachment; filename="{event.name}.ics"')
+        return add_cache_headers(response, etag, event.updated_at)
+
+    @extend_schema(
+        summary="Event with counts and first pages of participants and comments",
+        responses=EventSummarySerializer,
+    )
+    @action(methods=['GET'], detail=True, serializer_class=EventSummarySerializer)
+    def summary(self, request, uuid, format=None):  # noqa: A002, ARG002
+        event = self.get_object()
+        serializer = self.get_serializer(event)
+        return Response(serializer.data)
+
+    @extend_schema(summary="Participants of an event, cursor paginated")
+    @action(methods=['GET'], detail=True, serializer_class=ParticipantSerializer,
+            pagination_class=ParticipantCursorPagination)
+    def participants(self, request, uuid, format=None):  # noqa: A002, ARG002
+        event = self.get_object()
+        page = self.paginate_queryset(event.participants.all())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(summary="Comments of an event without nesting, cursor paginated")
+    @action(methods=['GET'], detail=True, serializer_class=CommentPageSerializer,
+            pagination_class=CommentCursorPagination)
+    def comments(self, request, uuid, format=None):  # noqa: A002, ARG002
+        event = self.get_object()
+        page = self.paginate_queryset(
+            event.comments.select_related('author', 'parent'))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        summary="Calendar feed URL combining all events of a participant's email",
+        responses={
+            200: CalendarFeedSerializer,
+            404: OpenApiResponse(description='Participant not found'),
+        },
+    )
+    @action(methods=['GET'], detail=False, serializer_class=CalendarFeedSerializer,
+            url_path='feed-token/(?P<participant_uuid>[^/.]+)')
+    def feed_token(self, request, participant_uuid, format=None):  # noqa: A002, ARG002
+        participant = get_object_or_404(Participant, uuid=participant_uuid)
+        token = calendar_feed_token(participant.email)
+        url = request.build_absolute_uri(
+            reverse('events:event-calendar-feed', args=[token]))
+        serializer = self.get_serializer({'token': token, 'url': url})
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Subscribable ICS feed of all events a participant's email attends",
+        responses={
+            200: OpenApiResponse(response=None, description='ICS calendar feed'),
+            304: OpenApiResponse(description='Feed has not changed (If-None-Match)'),
+            404: OpenApiResponse(description='Invalid feed token'),
+        },
+    )
+    @action(methods=['GET'], detail=False, url_path='feed/(?P<token>[^/.]+)')
+    def calendar_feed(self, request, token, format=None):  # noqa: A002, ARG002
+        try:
+            email = calendar_feed_email(token)
+        except signing.BadSignature as e:
+            raise Http404 from e
+        events = list(calendar_feed_events(email))
+        etag = calendar_feed_etag(events)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(calendar_feed(events),
+                                    content_type='text/calendar')
+        response['ETag'] = etag
         return response
 
     @action(methods=['DELETE'], detail=False, url_path='leave/(?P<uuid>[^/.]+)')
     def leave(self, request, uuid, format=None):  # noqa: A002, ARG002
-        participant = get_object_or_404(Participant, uuid=uuid)
+        participant = get_object_or_404(
+            Participant.objects.filter(event__deleted_at__isnull=True), uuid=uuid)
         participant.delete()
+        promote_waitlist(participant.event_id)
         return Response(status=204)
 
+    @action(methods=['DELETE'], detail=False,
+            url_path='leave-waitlist/(?P<uuid>[^/.]+)')
+    def leave_waitlist(self, request, uuid, format=None):  # noqa: A002, ARG002
+        entry = get_object_or_404(
+            WaitlistEntry.objects.filter(event__deleted_at__isnull=True), uuid=uuid)
+        entry.delete()
+        return Response(status=204)
+
+
+class ArchivedEventViewSet(mixins.RetrieveModelMixin,
+                           viewsets.GenericViewSet):
+    """Past events moved to the archive, which never change again."""
+
+    queryset = ArchivedEvent.objects.all()
+    lookup_field = 'uuid'
+    serializer_class = ArchivedEventSerializer
+
+    def retrieve(self, request, *args, **kwargs):  # noqa: ARG002
+        archived_event = self.get_object()
+        etag = f'"{archived_event.uuid}-archived"'
+        response = not_modified(request, etag, archived_event.archived_at)
+        if response is None:
+            response = Response(self.get_serializer(archived_event).data)
+        return add_cache_headers(response, etag, archived_event.archived_at)
+
 
 class CommentViewSet(mixins.CreateModelMixin,
                      viewsets.GenericViewSet):
@@ -238,12 +604,38 @@ class CommentViewSet(mixins.CreateModelMixin,
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
 
+    @extend_schema(
+        summary="List comments of an event as a tree",
+        parameters=[
+            OpenApiParameter(
+                name='depth',
+                description='Maximum nesting depth of returned replies',
+                required=False,
+                type=int,
+            ),
+            OpenApiParameter(
+                name='replies',
+                description='Maximum number of replies returned per comment',
+                required=False,
+                type=int,
+            ),
+        ],
+    )
     @action(methods=['GET'], detail=False, url_path='(?P<event_uuid>[^/.]+)')
     def list_by_event(self, request, event_uuid, format=None):  # noqa: A002, ARG002
         event = get_object_or_404(Event, uuid=event_uuid)
-        comments = event.comments.filter(parent__isnull=True)
-        serializer = self.get_serializer(comments, many=True)
-        return Response(serializer.data)
+        limits = CommentTreeQuerySerializer(data=request.query_params)
+        limits.is_valid(raise_exception=True)
+        depth = limits.validated_data.get('depth')
+        replies = limits.validated_data.get('replies')
+        etag = event_etag(event, 'comments', depth, replies)
+        response = not_modified(request, etag, event.updated_at)
+        if response is None:
+            tree = CommentTree.for_event(event, max_depth=depth, max_replies=replies)
+            context = {**self.get_serializer_context(), 'comment_tree': tree}
+            serializer = self.get_serializer(tree.roots, many=True, context=context)
+            response = Response(serializer.data)
+        return add_cache_headers(response, etag, event.updated_at)
 
     @action(methods=['DELETE'], detail=False,
             url_path='remove/(?P<comment_uuid>[^/.]+)/(?P<participant_or_event_edit_uuid>[^/.]+)')
@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Event, Participant, WaitlistEntry
+from .signals import participants_bulk_created
+
+# Waitlist entries promoted per transaction
+PROMOTION_BATCH_SIZE = 500
+
+
+def has_free_seats(event_id) -> bool:
+    return Event.objects.filter(
+        Q(participants_limit__isnull=True)
+        | Q(participant_count__lt=F('participants_limit')),
+        pk=event_id,
+    ).exists()
+
+
+def join(event, **fields) -> WaitlistEntry:
+    """Add a waitlist entry; raises IntegrityError if the email is already waiting."""
+    with transaction.atomic():
+        return WaitlistEntry.objects.create(event=event, **fields)
+
+
+def promote(event_id) -> tuple[list, bool]:
+    """
+    Move the oldest waitlist entries of an event into its free seats.
+
+    Runs in one transaction holding the event row lock, so accepts racing for
+    the same seats wait instead of oversubscribing. Returns the promoted
+    (email, name) pairs and whether another batch may be promotable.
+    """
+    with transaction.atomic():
+        event = (Event.objects.select_for_update()
+                 .filter(pk=event_id)
+                 .values('uuid', 'participants_limit', 'participant_count')
+                 .first())
+        if event is None:
+            return [], False
+        seats = PROMOTION_BATCH_SIZE
+        if event['participants_limit'] is not None:
+            seats = min(seats, event['participants_limit'] - event['participant_count'])
+        if seats <= 0:
+            return [], False
+
+        entries = list(WaitlistEntry.objects.filter(event_id=event_id)
+                       .order_by('id')[:seats])
+        # Entries of people who joined through another invitation meanwhile
+        joined = set(Participant.objects
+                     .filter(event_id=event_id,
+                             email__in=[entry.email for entry in entries])
+                     .values_list('email', flat=True))
+        promoted = [entry for entry in entries if entry.email not in joined]
+        # The entry uuid is the one its client holds, so it carries over to let
+        # the promoted participant comment and leave
+        Participant.objects.bulk_create(
+            Participant(uuid=entry.uuid, event_id=event_id, name=entry.name,
+                        email=entry.email)
+            for entry in promoted)
+        participants_bulk_created(event_id, event['uuid'], len(promoted))
+        WaitlistEntry.objects.filter(id__in=[entry.id for entry in entries]).delete()
+    return [(entry.email, entry.name) for entry in promoted], len(entries) == seats
@@ -18,6 +18,30 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/' # The URL prefix for media files
 MEDIA_ROOT = BASE_DIR / 'media' # The physical path where files are stored
 
+# Media files are named after their content hash, see events.storage
+STORAGES = {
+    'default': {
+        'BACKEND': 'events.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'private': {
+        'BACKEND': 'events.storage.PrivateStorage',
+    },
+}
+# Files shared by backend and worker that nginx must not serve
+PRIVATE_MEDIA_ROOT = os.environ.get('PRIVATE_MEDIA_ROOT', BASE_DIR / 'private')
+
+# Chunked image uploads are staged here until an event references them,
+# see events.uploads. Not served by nginx, unlike MEDIA_ROOT.
+IMAGE_UPLOAD_DIR = Path(os.environ.get('IMAGE_UPLOAD_DIR', BASE_DIR / 'uploads'))
+IMAGE_UPLOAD_MAX_SIZE = int(os.environ.get('IMAGE_UPLOAD_MAX_SIZE', '20971520'))
+IMAGE_UPLOAD_MAX_CHUNK_SIZE = 4 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 50_000_000
+# Unfinished or unused uploads older than this are removed by gc_media
+IMAGE_UPLOAD_EXPIRY_HOURS = 24
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 
@@ -48,6 +72,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'events.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -102,6 +127,51 @@ DATABASES = {
     },
 }
 
+# Read replicas of the primary as comma separated host[:port], see
+# events.replicas. Tests read them through the primary.
+DATABASE_REPLICAS = []
+for number, address in enumerate(
+        filter(None, os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',')), start=1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['events.replicas.ReplicaRouter']
+# Set after a mutation to read from the primary meanwhile; nginx also
+# bypasses its microcache on it
+REPLICA_STICKY_COOKIE = 'read_primary'
+# Longer than the replicas are expected to lag behind
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Public event payloads, see events/event_cache.py. Point it at a shared
+    # backend, e.g. django.core.cache.backends.redis.RedisCache, to share
+    # entries between processes.
+    'events': {
+        'BACKEND': os.environ.get('EVENT_CACHE_BACKEND',
+                                  'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('EVENT_CACHE_LOCATION', 'events'),
+    },
+}
+EVENT_CACHE_ALIAS = 'events'
+# Upper bound on how long a missed invalidation can serve a stale payload
+EVENT_CACHE_TIMEOUT = int(os.environ.get('EVENT_CACHE_TIMEOUT', '300'))
+# Seconds nginx may serve a cacheable API response without asking the backend
+API_MICROCACHE_SECONDS = int(os.environ.get('API_MICROCACHE_SECONDS', '1'))
+
+# Events that ended more than this many days ago are moved to the archive
+# tables by `manage.py archive_events`, see events.archive
+EVENT_RETENTION_DAYS = int(os.environ.get('EVENT_RETENTION_DAYS', '365'))
+# Expired events picked per query; each is archived in its own transaction
+EVENT_ARCHIVE_BATCH_SIZE = 50
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -144,6 +214,9 @@ EMAIL_USE_SSL = os.environ.get('EMAIL_USE_SSL', 'False') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', 'youremail@example.com')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', 'yourpassword')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'youremail@example.com')
+# Seconds a pooled email connection of a worker may stay unused before it is closed
+EMAIL_CONNECTION_IDLE_TIMEOUT = int(
+    os.environ.get('EMAIL_CONNECTION_IDLE_TIMEOUT', '30'))
 
 # settings.py
 DRAMATIQ_BROKER = {